@@ -1,15 +1,26 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 from dotenv import load_dotenv
 import os
 import asyncio
 from model.mood_food_model import MoodFoodRecommender
+from model.weather_scheduler import WeatherPrefetcher
+from model.admission import AdmissionController, BATCH_LANE, DEFAULT_LANE, PRIORITY_LANE
+from model.logs import bind_request_id, configure_logging, current_request_id
+from model.metrics import STAGE_LATENCY, render_metrics
+from model.persistence import atomic_write_text
+from model.tracing import SlowTraceRecorder, install_trace_hooks, run_traced
+import hmac
 import json
+import threading
 from datetime import datetime
 
 # Load environment variables
 load_dotenv()
 
+# Structured logs go through a queue, so writing them never blocks a request
+configure_logging()
+
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app)
@@ -28,25 +39,316 @@ if not os.path.exists(DATA_DIR):
 
 USER_DATA_FILE = os.path.join(DATA_DIR, 'user_data.json')
 
+# Streaming formats for /api/recommend
+STREAM_MIMETYPES = {
+    'ndjson': 'application/x-ndjson',
+    'sse': 'text/event-stream'
+}
+
+# Prometheus text exposition format
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Upper bound on texts accepted by /api/recommend/batch
+MAX_BATCH_ITEMS = int(os.getenv('MAX_BATCH_ITEMS', 1000))
+
+# Longer client-supplied chat session ids are ignored rather than stored
+MAX_SESSION_ID_LENGTH = 128
+
+# Longer client-supplied X-Request-Id values are replaced with a generated id
+MAX_REQUEST_ID_LENGTH = 128
+
+# Keep weather for recently active locations warm in the background
+weather_prefetcher = WeatherPrefetcher(
+    recommender.weather_cache,
+    recommender.fetch_observation,
+    recommender.weather_key,
+    interval=float(os.getenv('WEATHER_PREFETCH_INTERVAL', 15)),
+    max_concurrency=int(os.getenv('WEATHER_PREFETCH_CONCURRENCY', 4)),
+    idle_timeout=float(os.getenv('WEATHER_PREFETCH_IDLE', 1800)),
+    normalize=recommender.normalize_observations
+)
+
+# Shed load with fast 429s instead of queueing without bound
+admission = AdmissionController(
+    max_in_flight=int(os.getenv('MAX_IN_FLIGHT', 32)),
+    priority_in_flight=int(os.getenv('PRIORITY_IN_FLIGHT', 16)),
+    client_rate=float(os.getenv('CLIENT_RATE_LIMIT', 5)),
+    client_burst=float(os.getenv('CLIENT_BURST', 10)),
+    retry_after=int(os.getenv('ADMISSION_RETRY_AFTER', 1)),
+    batch_in_flight=int(os.getenv('BATCH_IN_FLIGHT', 2))
+)
+PRIORITY_LANE_ENABLED = os.getenv('PRIORITY_LANE', '1') == '1'
+
+# Peers (e.g. a load balancer) whose X-Forwarded-For and X-Client-Id headers are
+# believed; from anyone else those headers are client-controlled and ignored
+TRUSTED_PROXIES = {entry.strip() for entry in os.getenv('TRUSTED_PROXIES', '').split(',') if entry.strip()}
+
+# Opt-in request tracing: clients on the allowlist ('*' for everyone), matched on
+# the same proxy-checked identity as rate limits, or sending the DEBUG_TOKEN secret
+# as X-Debug-Token, may ask for a timing breakdown with ?debug=trace|cprofile|sample
+# or X-Debug-Trace
+DEBUG_ALLOWLIST = {entry.strip() for entry in os.getenv('DEBUG_ALLOWLIST', '').split(',') if entry.strip()}
+DEBUG_TOKEN = os.getenv('DEBUG_TOKEN', '')
+DEBUG_MODES = ('trace', 'cprofile', 'sample')
+install_trace_hooks(recommender)
+
+# Admin endpoints are disabled unless a token is configured
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN', '')
+MODEL_DRAIN_TIMEOUT = float(os.getenv('MODEL_DRAIN_TIMEOUT', 30))
+
+# Sampled tracing keeps the slowest requests on disk for later inspection
+slow_traces = SlowTraceRecorder(
+    os.getenv('TRACE_DIR', os.path.join(DATA_DIR, 'traces')),
+    keep=int(os.getenv('TRACE_KEEP', 20)),
+    sample_rate=float(os.getenv('TRACE_SAMPLE_RATE', 0))
+)
+
 def load_user_data():
     if os.path.exists(USER_DATA_FILE):
         with open(USER_DATA_FILE, 'r') as f:
             return json.load(f)
     return []
 
+# Serializes the read-append-write in save_user_data across request threads
+user_data_lock = threading.Lock()
+
 def save_user_data(data):
-    user_data = load_user_data()
-    user_data.append(data)
-    with open(USER_DATA_FILE, 'w') as f:
-        json.dump(user_data, f, indent=2)
+    with STAGE_LATENCY.time(stage='persistence'), user_data_lock:
+        user_data = load_user_data()
+        user_data.append(data)
+        atomic_write_text(USER_DATA_FILE, json.dumps(user_data, indent=2))
+
+def parse_batch_items(data):
+    """Normalize a batch request body into item dicts; returns (items, error)."""
+    items = data.get('items') if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        return None, 'items must be a non-empty list'
+    if len(items) > MAX_BATCH_ITEMS:
+        return None, f'At most {MAX_BATCH_ITEMS} items per batch'
+    # Plain strings are shorthand for {'text': ...}
+    return [{'text': item} if isinstance(item, str) else item for item in items], None
+
+def recommendation_response(result):
+    """Public response body for a recommend() result."""
+    response = {
+        'mood': result['mood'],
+        'recommendations': result['recommendations'],
+        'weather': result['weather'],
+        'degraded': result['degraded']
+    }
+    if result.get('session'):
+        response['session'] = result['session']
+    return response
+
+def requested_session(body_value, header_value):
+    """Chat session id from the body's session_id or the X-Session-Id header, or None."""
+    session_id = body_value or header_value
+    if isinstance(session_id, str) and 0 < len(session_id) <= MAX_SESSION_ID_LENGTH:
+        return session_id
+    return None
+
+def requested_request_id(header_value):
+    """Client's X-Request-Id if it is usable as a correlation id, else None (one is generated)."""
+    if isinstance(header_value, str) and 0 < len(header_value) <= MAX_REQUEST_ID_LENGTH:
+        return header_value
+    return None
+
+def requested_stream_format(stream_arg, accept):
+    """Streaming format asked for via ?stream= or the Accept header, or None."""
+    if stream_arg in STREAM_MIMETYPES:
+        return stream_arg
+    for stream_format, mimetype in STREAM_MIMETYPES.items():
+        if mimetype in accept:
+            return stream_format
+    return None
+
+def format_event(stream_format, event, data):
+    """Encode one stage event as an NDJSON line or an SSE message."""
+    if event == 'done':
+        data = recommendation_response(data)
+    if stream_format == 'sse':
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    return json.dumps({'event': event, 'data': data}) + '\n'
+
+def stream_events(stream_format, events):
+    """Drive an async event generator from a synchronous WSGI response iterator."""
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            try:
+                event, data = loop.run_until_complete(events.__anext__())
+            except StopAsyncIteration:
+                break
+            yield format_event(stream_format, event, data)
+    except Exception as e:
+        yield format_event(stream_format, 'error', {'error': str(e)})
+    finally:
+        loop.run_until_complete(events.aclose())
+        loop.close()
+
+def request_lane(text):
+    """Keyword-path requests never touch the model, so they get their own lane."""
+    if PRIORITY_LANE_ENABLED and isinstance(text, str) and recommender.is_keyword_path(text):
+        return PRIORITY_LANE
+    return DEFAULT_LANE
+
+def client_identity(client_header, forwarded_for, remote_addr):
+    """Rate-limit key: the peer address, or who a trusted proxy says the client is."""
+    if remote_addr not in TRUSTED_PROXIES:
+        return remote_addr or 'anonymous'
+    if client_header:
+        return client_header
+    # Walk back from the proxy: the first address our own proxies didn't add is the
+    # client; anything further left was supplied by the client itself
+    for address in reversed((forwarded_for or '').split(',')):
+        address = address.strip()
+        if address and address not in TRUSTED_PROXIES:
+            return address
+    return remote_addr
+
+def batch_cost(items):
+    """Admission cost of a batch: one rate-limit token per text (malformed bodies cost one)."""
+    return min(len(items), MAX_BATCH_ITEMS) if isinstance(items, list) and items else 1
+
+def rejection_body(decision):
+    if decision.reason == 'rate_limited':
+        return {'error': 'Rate limit exceeded, retry later'}
+    return {'error': 'Server is busy, retry later'}
+
+def readiness_status():
+    if recommender.ready:
+        return 'healthy'
+    # A finished warm-up that left the process unready means the model failed it
+    return 'degraded' if recommender.warmup_report else 'warming_up'
+
+def health_body():
+    return {
+        'status': readiness_status(),
+        'ready': recommender.ready,
+        'message': 'Mood Food API is running',
+        'analyzer': recommender.analyzer_mode,
+        'mood_scoring': recommender.mood_scoring,
+        'startup': recommender.startup_report,
+        'warmup': recommender.warmup_report,
+        'model_version': recommender.model_version,
+        'model_reload': recommender.reload_status,
+        'chat_sessions': len(recommender.sessions),
+        'weather_circuit': recommender.weather_breaker.snapshot(),
+        'admission': admission.snapshot()
+    }
+
+def admin_authorized(token):
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token or '', ADMIN_TOKEN)
+
+def start_model_reload(data):
+    """Kick off a background model reload; returns (body, status)."""
+    model_dir = (data or {}).get('model_dir')
+    if model_dir and not os.path.isdir(model_dir):
+        return {'error': f'Model directory not found: {model_dir}'}, 400
+    if not recommender.start_model_reload(model_dir, MODEL_DRAIN_TIMEOUT):
+        return {'error': 'A model reload is already running', 'reload': recommender.reload_status}, 409
+    return {'message': 'Model reload started', 'reload': recommender.reload_status}, 202
+
+def current_client():
+    return client_identity(request.headers.get('X-Client-Id'), request.headers.get('X-Forwarded-For'),
+                           request.remote_addr)
+
+def admit_request(lane, cost=1):
+    """Admit the current Flask request on a lane; returns a 429 response or None."""
+    decision = admission.try_admit(current_client(), lane, cost)
+    if decision.admitted:
+        return None
+    return jsonify(rejection_body(decision)), 429, {'Retry-After': str(decision.retry_after)}
+
+def requested_debug_mode(debug_arg, debug_header, client, token=None):
+    """Debug mode the client asked for, if it is allowed to; else None."""
+    mode = debug_arg or debug_header
+    if mode not in DEBUG_MODES:
+        return None
+    if '*' in DEBUG_ALLOWLIST or client in DEBUG_ALLOWLIST:
+        return mode
+    if DEBUG_TOKEN and hmac.compare_digest(token or '', DEBUG_TOKEN):
+        return mode
+    return None
+
+async def recommend_with_debug(text, debug_mode, request_id, session_id=None):
+    """recommend() plus an optional trace/profile; returns (result, debug payload or None)."""
+    sampled = slow_traces.should_sample()
+    if not debug_mode and not sampled:
+        return await recommender.recommend(text, session_id=session_id), None
+    
+    profile = debug_mode if debug_mode in ('cprofile', 'sample') else None
+    result, trace, profile_summary = await run_traced(recommender.recommend(text, session_id=session_id),
+                                                      request_id, profile)
+    if sampled:
+        slow_traces.offer(trace)
+    if not debug_mode:
+        return result, None
+    debug = {'trace': trace.summary(), 'timings': result['timings']}
+    if profile_summary:
+        debug['profile'] = profile_summary
+    return result, debug
+
+def start_weather_prefetch():
+    """Seed the prefetcher with the current and recently saved locations, then start it."""
+    if not recommender.weatherbit_api_key or os.getenv('WEATHER_PREFETCH', '1') != '1':
+        return
+    weather_prefetcher.track(recommender.user_data['location'])
+    recent = [entry.get('location') for entry in load_user_data()[-50:] if isinstance(entry, dict)]
+    for location in dict.fromkeys(filter(None, recent)):
+        weather_prefetcher.track(location)
+    weather_prefetcher.start()
+
+def start_warm_up():
+    """Warm the model and Weatherbit connection in the background; /api/health waits for it."""
+    if os.getenv('WARMUP', '1') != '1':
+        recommender.ready = True
+        return
+    threading.Thread(
+        target=recommender.warm_up,
+        kwargs={'rounds': int(os.getenv('WARMUP_ROUNDS', 2))},
+        name='warm-up',
+        daemon=True
+    ).start()
+
+# Process that started the background threads. Threads don't survive fork, so
+# they are started per process on first use, never at import: with gunicorn
+# --preload the module is imported once in the master and every forked
+# worker needs its own warm-up and prefetcher.
+_background_pid = None
+_background_lock = threading.Lock()
+
+def start_background_work():
+    """Start warm-up and weather prefetch once in the current process."""
+    global _background_pid
+    with _background_lock:
+        if _background_pid == os.getpid():
+            return
+        _background_pid = os.getpid()
+    start_weather_prefetch()
+    start_warm_up()
+
+@app.before_request
+def bind_request_context():
+    """Correlation id for this request's log records, echoed back as X-Request-Id."""
+    # The first request (typically a health probe) starts this worker's background work
+    start_background_work()
+    bind_request_id(requested_request_id(request.headers.get('X-Request-Id')))
+
+@app.after_request
+def add_request_id_header(response):
+    response.headers['X-Request-Id'] = current_request_id()
+    return response
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
-    return jsonify({
-        'status': 'healthy',
-        'message': 'Mood Food API is running'
-    })
+    """Health check endpoint; 503 until warm-up has finished so traffic skips cold workers"""
+    return jsonify(health_body()), 200 if recommender.ready else 503
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics endpoint"""
+    return Response(render_metrics(), content_type=METRICS_CONTENT_TYPE)
 
 @app.route('/api/recommend', methods=['POST'])
 async def get_recommendations():
@@ -59,16 +361,39 @@ async def get_recommendations():
             return jsonify({
                 'error': 'Text parameter is required'
             }), 400
-            
-        # Get recommendations using the ML model
-        mood, recommendations, weather = await recommender.get_recommendation(text)
         
-        response = {
-            'mood': mood,
-            'recommendations': recommendations,
-            'weather': weather
-        }
+        lane = request_lane(text)
+        rejected = admit_request(lane)
+        if rejected:
+            return rejected
         
+        session_id = requested_session(data.get('session_id'), request.headers.get('X-Session-Id'))
+        
+        # Streaming mode: emit each stage as soon as it is ready
+        stream_format = requested_stream_format(request.args.get('stream'), request.headers.get('Accept', ''))
+        if stream_format:
+            response = Response(
+                stream_events(stream_format, recommender.recommend_stream(text, session_id=session_id)),
+                mimetype=STREAM_MIMETYPES[stream_format],
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            )
+            # Hold the slot until the server has finished sending the stream
+            response.call_on_close(lambda: admission.release(lane))
+            return response
+        
+        debug_mode = requested_debug_mode(request.args.get('debug'), request.headers.get('X-Debug-Trace'),
+                                          current_client(), request.headers.get('X-Debug-Token'))
+        try:
+            # Get recommendations using the ML model, within the request deadline
+            result, debug = await recommend_with_debug(
+                text, debug_mode, current_request_id(), session_id
+            )
+        finally:
+            admission.release(lane)
+        
+        response = recommendation_response(result)
+        if debug:
+            response['debug'] = debug
         return jsonify(response)
         
     except Exception as e:
@@ -76,6 +401,39 @@ async def get_recommendations():
             'error': str(e)
         }), 500
 
+@app.route('/api/recommend/batch', methods=['POST'])
+async def get_batch_recommendations():
+    """Get food recommendations for a list of texts with optional per-item locations"""
+    try:
+        data = request.get_json()
+        items, error = parse_batch_items(data)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        rejected = admit_request(BATCH_LANE, batch_cost(items))
+        if rejected:
+            return rejected
+        try:
+            results = await recommender.recommend_batch(items)
+        finally:
+            admission.release(BATCH_LANE)
+        return jsonify({'results': results})
+        
+    except Exception as e:
+        return jsonify({
+            'error': str(e)
+        }), 500
+
+@app.route('/api/admin/reload-model', methods=['GET', 'POST'])
+def reload_model():
+    """Hot-reload the emotion model (POST) or report reload progress (GET)"""
+    if not admin_authorized(request.headers.get('X-Admin-Token')):
+        return jsonify({'error': 'Forbidden'}), 403
+    if request.method == 'GET':
+        return jsonify({'model_version': recommender.model_version, 'reload': recommender.reload_status})
+    body, status = start_model_reload(request.get_json(silent=True))
+    return jsonify(body), status
+
 @app.route('/api/location', methods=['POST'])
 def set_location():
     """Set the user's location"""
@@ -102,8 +460,8 @@ def set_location():
 def toggle_weather():
     """Toggle weather-based recommendations"""
     try:
-        recommender.toggle_weather()
-        status = "enabled" if recommender.user_data['weather_enabled'] else "disabled"
+        enabled = recommender.toggle_weather()
+        status = "enabled" if enabled else "disabled"
         return jsonify({
             'message': f'Weather-based recommendations {status}'
         })
@@ -123,5 +481,6 @@ def save_user_data_endpoint():
         return jsonify({'error': str(e)}), 500
 
 if __name__ == '__main__':
+    start_background_work()
     port = int(os.getenv('PORT', 5000))
     app.run(host='0.0.0.0', port=port) 
\ No newline at end of file
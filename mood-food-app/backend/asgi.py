@@ -0,0 +1,265 @@
+"""ASGI serving path for the recommendation API.
+
+Exposes the same routes as app.py, but every request runs on one
+long-lived event loop per worker, so weather I/O and model inference from
+concurrent requests overlap and single-text model calls are coalesced into
+batches. Shares the recommender and helpers defined in app.py.
+
+Run it with the same worker count as the Flask deployment to compare:
+
+    gunicorn -w 4 -b 0.0.0.0:5000 app:app
+    uvicorn asgi:app --workers 4 --host 0.0.0.0 --port 5000
+"""
+import json
+import os
+from urllib.parse import parse_qs
+from typing import Dict, Tuple
+
+from app import (METRICS_CONTENT_TYPE, STREAM_MIMETYPES, admin_authorized, admission, batch_cost,
+                 client_identity, format_event, health_body, parse_batch_items, recommend_with_debug,
+                 recommendation_response, recommender, rejection_body, request_lane,
+                 requested_debug_mode, requested_request_id, requested_session, requested_stream_format,
+                 save_user_data, start_background_work, start_model_reload)
+from model.admission import BATCH_LANE
+from model.logs import bind_request_id
+from model.metrics import render_metrics
+from model.batcher import InferenceBatcher
+
+CORS_HEADERS = [
+    (b'access-control-allow-origin', b'*'),
+    # Every request header the handlers read; Flask-CORS allows any header
+    (b'access-control-allow-headers',
+     b'Content-Type, X-Session-Id, X-Request-Id, X-Client-Id, X-Debug-Trace, X-Debug-Token, X-Admin-Token'),
+    (b'access-control-allow-methods', b'GET, POST, OPTIONS')
+]
+
+
+async def health_check(data: Dict) -> Tuple[Dict, int]:
+    """Health check endpoint; 503 until warm-up has finished so traffic skips cold workers"""
+    return health_body(), 200 if recommender.ready else 503
+
+
+async def metrics(data: Dict) -> Tuple[str, int]:
+    """Prometheus metrics endpoint"""
+    return render_metrics(), 200
+
+
+async def get_recommendations(data: Dict, debug_mode: str = None, request_id: str = None,
+                              session_id: str = None) -> Tuple[Dict, int]:
+    """Get food recommendations based on mood"""
+    text = data.get('text')
+    if not text:
+        return {'error': 'Text parameter is required'}, 400
+
+    result, debug = await recommend_with_debug(text, debug_mode, request_id, session_id)
+    response = recommendation_response(result)
+    if debug:
+        response['debug'] = debug
+    return response, 200
+
+
+async def stream_recommendations(send, text: str, stream_format: str, session_id: str = None):
+    """Send each recommendation stage as its own chunk"""
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [(b'content-type', STREAM_MIMETYPES[stream_format].encode()),
+                    (b'cache-control', b'no-cache')] + CORS_HEADERS
+    })
+    events = recommender.recommend_stream(text, session_id=session_id)
+    try:
+        async for event, data in events:
+            chunk = format_event(stream_format, event, data)
+            await send({'type': 'http.response.body', 'body': chunk.encode(), 'more_body': True})
+    except Exception as e:
+        chunk = format_event(stream_format, 'error', {'error': str(e)})
+        await send({'type': 'http.response.body', 'body': chunk.encode(), 'more_body': True})
+    finally:
+        await events.aclose()
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+async def get_batch_recommendations(data: Dict) -> Tuple[Dict, int]:
+    """Get food recommendations for a list of texts with optional per-item locations"""
+    items, error = parse_batch_items(data)
+    if error:
+        return {'error': error}, 400
+    return {'results': await recommender.recommend_batch(items)}, 200
+
+
+async def reload_model(data: Dict) -> Tuple[Dict, int]:
+    """Hot-reload the emotion model in the background"""
+    return start_model_reload(data)
+
+
+async def reload_status(data: Dict) -> Tuple[Dict, int]:
+    """Progress of the last model reload"""
+    return {'model_version': recommender.model_version, 'reload': recommender.reload_status}, 200
+
+
+async def set_location(data: Dict) -> Tuple[Dict, int]:
+    """Set the user's location"""
+    location = data.get('location')
+    if not location:
+        return {'error': 'Location parameter is required'}, 400
+
+    # May fall back to a network validation call
+    await recommender.run_blocking(recommender.set_location, location)
+    return {'message': f'Location updated to {location}'}, 200
+
+
+async def toggle_weather(data: Dict) -> Tuple[Dict, int]:
+    """Toggle weather-based recommendations"""
+    enabled = await recommender.run_blocking(recommender.toggle_weather)
+    status = "enabled" if enabled else "disabled"
+    return {'message': f'Weather-based recommendations {status}'}, 200
+
+
+async def save_user_data_endpoint(data: Dict) -> Tuple[Dict, int]:
+    await recommender.run_blocking(save_user_data, data)
+    return {'message': 'Data saved successfully'}, 200
+
+
+ROUTES = {
+    ('GET', '/api/health'): health_check,
+    ('GET', '/api/metrics'): metrics,
+    ('POST', '/api/recommend'): get_recommendations,
+    ('POST', '/api/recommend/batch'): get_batch_recommendations,
+    ('POST', '/api/admin/reload-model'): reload_model,
+    ('GET', '/api/admin/reload-model'): reload_status,
+    ('POST', '/api/location'): set_location,
+    ('POST', '/api/weather/toggle'): toggle_weather,
+    ('POST', '/api/save-user-data'): save_user_data_endpoint
+}
+
+ADMITTED_HANDLERS = (get_recommendations, get_batch_recommendations)
+ADMIN_HANDLERS = (reload_model, reload_status)
+
+
+async def read_body(receive) -> bytes:
+    body = b''
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get('body', b'')
+        more_body = message.get('more_body', False)
+    return body
+
+
+async def send_json(send, payload: Dict, status: int, headers=()):
+    await send_body(send, json.dumps(payload).encode(), b'application/json', status, headers)
+
+
+async def send_body(send, body: bytes, content_type: bytes, status: int, headers=()):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', content_type),
+                    (b'content-length', str(len(body)).encode())] + CORS_HEADERS + list(headers)
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            start_background_work()
+            # One batcher per worker, bound to this worker's event loop
+            recommender.emotion_batcher = InferenceBatcher(
+                recommender.classify_emotions_batch,
+                recommender.run_blocking,
+                max_batch_size=int(os.getenv('INFERENCE_BATCH_SIZE', 16)),
+                max_wait=float(os.getenv('INFERENCE_BATCH_WAIT_MS', 5)) / 1000
+            )
+            recommender.emotion_batcher.start()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            if recommender.emotion_batcher:
+                await recommender.emotion_batcher.stop()
+                recommender.emotion_batcher = None
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+def with_request_id(send, request_id: str):
+    """Wrap send so every response carries the request's X-Request-Id header."""
+    async def send_with_request_id(message):
+        if message['type'] == 'http.response.start':
+            message = dict(message, headers=list(message.get('headers', [])) + [(b'x-request-id', request_id.encode())])
+        await send(message)
+    return send_with_request_id
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+    # Servers run without lifespan events still start the background work, on first request
+    start_background_work()
+
+    headers = {name.decode().lower(): value.decode() for name, value in scope.get('headers', [])}
+    # Each request runs in its own task, so the id stays with this request's log records
+    request_id = bind_request_id(requested_request_id(headers.get('x-request-id')))
+    send = with_request_id(send, request_id)
+
+    method, path = scope['method'], scope['path'].rstrip('/') or '/'
+    if method == 'OPTIONS':
+        await send({'type': 'http.response.start', 'status': 204, 'headers': CORS_HEADERS})
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+
+    handler = ROUTES.get((method, path))
+    if handler is None:
+        known_path = any(route_path == path for _, route_path in ROUTES)
+        return await send_json(send, {'error': 'Method not allowed' if known_path else 'Not found'},
+                               405 if known_path else 404)
+
+    lane = None
+    try:
+        body = await read_body(receive)
+        try:
+            data = json.loads(body) if body else {}
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            return await send_json(send, {'error': 'Request body must be a JSON object'}, 400)
+
+        if handler in ADMIN_HANDLERS and not admin_authorized(headers.get('x-admin-token')):
+            return await send_json(send, {'error': 'Forbidden'}, 403)
+
+        # Only the recommendation routes do enough work to need admission control
+        client = client_identity(headers.get('x-client-id'), headers.get('x-forwarded-for'),
+                                 (scope.get('client') or [None])[0])
+        if handler in ADMITTED_HANDLERS and (data.get('text') or data.get('items')):
+            if handler is get_recommendations:
+                requested_lane, cost = request_lane(data.get('text')), 1
+            else:
+                requested_lane, cost = BATCH_LANE, batch_cost(data.get('items'))
+            decision = admission.try_admit(client, requested_lane, cost)
+            if not decision.admitted:
+                return await send_json(send, rejection_body(decision), 429,
+                                       [(b'retry-after', str(decision.retry_after).encode())])
+            lane = requested_lane
+
+        if handler is get_recommendations:
+            query = parse_qs(scope.get('query_string', b'').decode())
+            session_id = requested_session(data.get('session_id'), headers.get('x-session-id'))
+            stream_format = requested_stream_format(query.get('stream', [None])[0], headers.get('accept', ''))
+            if stream_format and data.get('text'):
+                return await stream_recommendations(send, data['text'], stream_format, session_id)
+            debug_mode = requested_debug_mode(query.get('debug', [None])[0], headers.get('x-debug-trace'), client,
+                                              headers.get('x-debug-token'))
+            payload, status = await handler(data, debug_mode, request_id, session_id)
+        else:
+            payload, status = await handler(data)
+    except Exception as e:
+        payload, status = {'error': str(e)}, 500
+    finally:
+        if lane:
+            admission.release(lane)
+    if isinstance(payload, str):
+        await send_body(send, payload.encode(), METRICS_CONTENT_TYPE.encode(), status)
+    else:
+        await send_json(send, payload, status)
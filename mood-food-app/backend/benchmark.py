@@ -0,0 +1,433 @@
+"""Reproducible benchmarks for the recommender hot paths.
+
+Every run uses a seeded synthetic corpus, a deterministic stub in place of
+the emotion model and a scratch working directory, so numbers are
+comparable between commits on the same machine:
+
+    python benchmark.py run --output bench/before.json
+    python benchmark.py run --output bench/after.json
+    python benchmark.py compare bench/before.json bench/after.json
+
+    python benchmark.py corpus --size 500 > corpus.jsonl
+
+The startup benchmark loads the real emotion model instead, in several
+worker processes alive at once, and reports load time and memory per worker:
+
+    EMOTION_MODEL_DIR=models/go_emotions python benchmark.py startup --workers 4
+"""
+import argparse
+import contextlib
+import datetime
+import hashlib
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent
+
+# go_emotions labels, in the model's output order
+EMOTION_LABELS = [
+    'admiration', 'amusement', 'anger', 'annoyance', 'approval', 'caring', 'confusion',
+    'curiosity', 'desire', 'disappointment', 'disapproval', 'disgust', 'embarrassment',
+    'excitement', 'fear', 'gratitude', 'grief', 'joy', 'love', 'nervousness', 'optimism',
+    'pride', 'realization', 'relief', 'remorse', 'sadness', 'surprise', 'neutral'
+]
+
+# Sentence fragments without mood keywords, so texts built from them take the model path
+SUBJECTS = ['the meeting', 'my commute', 'the weekend', 'this afternoon', 'the new job',
+            'my sister', 'the weather', 'dinner plans', 'the exam', 'our trip']
+PREDICATES = ['went on longer than expected', 'turned out differently', 'is coming up soon',
+              'changed at the last minute', 'was something else', 'keeps getting moved',
+              'reminded me of home', 'was a bit of a surprise', 'took most of the day']
+ENDINGS = ['', 'honestly', 'I guess', 'if that makes sense', 'and now I am hungry']
+
+
+class StubClassifier:
+    """Deterministic stand-in for the emotion pipeline with an optional fixed latency."""
+
+    def __init__(self, top_k: Optional[int] = 3, delay: float = 0.0):
+        self.top_k = top_k
+        self.delay = delay
+
+    def _scores(self, text: str) -> List[Dict]:
+        digest = hashlib.sha256(text.encode()).digest()
+        if self.top_k is None:
+            # Every label, as the pipeline returns them for distribution scoring
+            scores = [{'label': label, 'score': digest[i] / 255} for i, label in enumerate(EMOTION_LABELS)]
+        else:
+            scores = [{'label': EMOTION_LABELS[digest[i] % len(EMOTION_LABELS)], 'score': digest[i + 8] / 255}
+                      for i in range(self.top_k)]
+        return sorted(scores, key=lambda score: score['score'], reverse=True)
+
+    def __call__(self, texts, **kwargs):
+        if self.delay:
+            time.sleep(self.delay)
+        if isinstance(texts, str):
+            texts = [texts]
+        return [self._scores(text) for text in texts]
+
+
+def use_stub_classifier(delay: float = 0.0):
+    """Make MoodFoodRecommender build a StubClassifier instead of loading the real model."""
+    from model import mood_food_model
+    mood_food_model.pipeline = lambda *args, **kwargs: StubClassifier(kwargs.get('top_k', 3), delay)
+
+
+def synthetic_corpus(mood_keywords: Dict, size: int, seed: int = 0) -> List[Dict]:
+    """Seeded mix of keyword-path and model-path texts, roughly half of each."""
+    rng = random.Random(seed)
+    moods = sorted(mood_keywords)
+    corpus = []
+    for index in range(size):
+        if index % 2 == 0:
+            mood = rng.choice(moods)
+            lexicon = mood_keywords[mood]
+            intensifiers, context = sorted(lexicon.intensifiers), sorted(lexicon.context)
+            words = [rng.choice(intensifiers)] if intensifiers and rng.random() < 0.5 else []
+            words.append(rng.choice(lexicon.keywords))
+            text = f"I feel {' '.join(words)} today"
+            if context and rng.random() < 0.5:
+                text += f", thinking about {rng.choice(context)}"
+            corpus.append({'text': text, 'path': 'keyword'})
+        else:
+            text = f"{rng.choice(SUBJECTS)} {rng.choice(PREDICATES)} {rng.choice(ENDINGS)}".strip()
+            corpus.append({'text': text[0].upper() + text[1:], 'path': 'model'})
+    return corpus
+
+
+def measure(func: Callable, repeat: int, min_time: float) -> Dict:
+    """Time func over `repeat` rounds, each long enough to exceed min_time; per-call stats in ms."""
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+
+    rounds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        rounds.append((time.perf_counter() - started) / number * 1000)
+    rounds.sort()
+    median = statistics.median(rounds)
+    return {
+        'number': number,
+        'repeat': repeat,
+        'min_ms': rounds[0],
+        'median_ms': median,
+        'mean_ms': statistics.mean(rounds),
+        'max_ms': rounds[-1],
+        'stdev_ms': statistics.stdev(rounds) if len(rounds) > 1 else 0.0,
+        'ops_per_sec': 1000 / median if median else float('inf')
+    }
+
+
+def cycle(items: List) -> Callable:
+    """Callable returning the items in turn, so each call sees a different input."""
+    state = {'index': 0}
+
+    def next_item():
+        item = items[state['index'] % len(items)]
+        state['index'] += 1
+        return item
+    return next_item
+
+
+def recommender_benchmarks(recommender, corpus: List[Dict], history_sizes: List[int]) -> Dict[str, Callable]:
+    keyword_texts = cycle([item['text'] for item in corpus if item['path'] == 'keyword'])
+    model_texts = cycle([item['text'] for item in corpus if item['path'] == 'model'])
+    moods = cycle(sorted(recommender.food_mood_mapping))
+    foods = cycle([food for mood_foods in recommender.food_mood_mapping.values() for food in mood_foods])
+    temperatures = cycle([20, 40, 55, 68, 80, 95])
+    seasons = cycle(['spring', 'summer', 'fall', 'winter'])
+    # Shaped like normalize_weather output; only the temperature is read by scoring
+    weather = {'temperature': 68, 'feels_like': 68, 'condition': 'cloudy', 'is_hot': False, 'is_cold': False,
+               'is_rainy': False, 'is_sunny': False, 'humidity': 55, 'wind_speed': 6, 'clouds': 60, 'precip': 0}
+
+    # Scoring that get_food_recommendations skips on a ranked foods cache hit
+    ranked_mood = 'happy'
+    ranked_foods = list(recommender.food_mood_mapping[ranked_mood])
+
+    # One batch of model-path texts with precomputed scores, to time mood interpretation alone
+    batch_texts = [model_texts() for _ in range(64)]
+    batch_scores = recommender.classify_emotions_batch(batch_texts)
+
+    benchmarks = {
+        'analyze_mood.keyword': lambda: recommender.analyze_mood(keyword_texts()),
+        'analyze_mood.model': lambda: recommender.analyze_mood(model_texts()),
+        'interpret_emotions_batch.64': lambda: recommender.interpret_emotions_batch(batch_texts, batch_scores),
+        'calculate_food_score': lambda: recommender.calculate_food_score(foods(), temperatures(), seasons()),
+        'get_food_recommendations': lambda: recommender.get_food_recommendations(moods(), weather),
+        'get_food_recommendations.no_weather': lambda: recommender.get_food_recommendations(moods()),
+        'rank_foods': lambda: recommender.rank_foods(ranked_mood, ranked_foods, temperatures(), seasons())
+    }
+    for size in history_sizes:
+        benchmarks[f'save_user_data.history_{size}'] = save_with_history(recommender, size)
+    return benchmarks
+
+
+def save_with_history(recommender, size: int) -> Callable:
+    history = [{'date': datetime.datetime(2024, 1, 1).isoformat(), 'mood': 'happy', 'food': f'Food {index}'}
+               for index in range(size)]
+
+    def run():
+        recommender.user_data['history'] = history
+        recommender.save_user_data()
+    return run
+
+
+def endpoint_benchmarks(client, corpus: List[Dict]) -> Dict[str, Callable]:
+    keyword_texts = cycle([item['text'] for item in corpus if item['path'] == 'keyword'])
+    model_texts = cycle([item['text'] for item in corpus if item['path'] == 'model'])
+
+    def post(texts):
+        def run():
+            response = client.post('/api/recommend', json={'text': texts()})
+            if response.status_code != 200:
+                raise RuntimeError(f"/api/recommend returned {response.status_code}: {response.get_data(as_text=True)}")
+        return run
+    return {
+        'endpoint.recommend.keyword': post(keyword_texts),
+        'endpoint.recommend.model': post(model_texts)
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run(args) -> Dict:
+    output = Path(args.output).resolve() if args.output else None
+
+    # Offline, unthrottled and isolated from the real user data files
+    os.environ['WEATHERBIT_API_KEY'] = ''
+    os.environ['WEATHER_PREFETCH'] = '0'
+    os.environ['CLIENT_RATE_LIMIT'] = '0'
+    os.environ['TRACE_SAMPLE_RATE'] = '0'
+    # Per-request log records would land on stdout, next to the JSON report
+    os.environ['LOG_LEVEL'] = 'WARNING'
+    scratch = tempfile.TemporaryDirectory(prefix='moodfood-bench-')
+    os.chdir(scratch.name)
+    sys.path.insert(0, str(BACKEND_DIR))
+
+    # Keep anything third-party code prints out of the results
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        use_stub_classifier(args.model_delay_ms / 1000)
+        from model.mood_food_model import MoodFoodRecommender
+        recommender = MoodFoodRecommender()
+        # Without an API key weather starts disabled, which would skip scoring entirely;
+        # the benchmarks pass their own weather, so nothing is fetched
+        recommender.user_data['weather_enabled'] = True
+        corpus = synthetic_corpus(recommender.mood_keywords, args.corpus_size, args.seed)
+
+        benchmarks = recommender_benchmarks(recommender, corpus, args.history_sizes)
+        if not args.skip_endpoints:
+            from app import app
+            benchmarks.update(endpoint_benchmarks(app.test_client(), corpus))
+
+        results = {}
+        for name, func in benchmarks.items():
+            if args.filter and args.filter not in name:
+                continue
+            random.seed(args.seed)
+            results[name] = measure(func, args.repeat, args.min_time)
+            print(f"{name:<40} {results[name]['median_ms']:>10.4f} ms  ({results[name]['ops_per_sec']:.0f} ops/s)",
+                  file=sys.stderr)
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'seed': args.seed,
+            'corpus_size': args.corpus_size,
+            'model_delay_ms': args.model_delay_ms
+        },
+        'benchmarks': results
+    }
+    os.chdir(BACKEND_DIR)
+    scratch.cleanup()
+
+    if output:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2))
+    return report
+
+
+def compare(args) -> int:
+    """Print median changes between two result files; non-zero exit on regressions."""
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+    with open(args.current, 'r') as f:
+        current = json.load(f)
+
+    for key in ('python', 'machine', 'model_delay_ms'):
+        if baseline['meta'].get(key) != current['meta'].get(key):
+            print(f"warning: {key} differs ({baseline['meta'].get(key)} vs {current['meta'].get(key)})")
+
+    print(f"{'benchmark':<40} {baseline['meta']['commit']:>12} {current['meta']['commit']:>12} {'change':>9}")
+    regressions = 0
+    for name in sorted(set(baseline['benchmarks']) | set(current['benchmarks'])):
+        before = baseline['benchmarks'].get(name)
+        after = current['benchmarks'].get(name)
+        if not before or not after:
+            print(f"{name:<40} {'-' if not before else 'present':>12} {'-' if not after else 'present':>12}")
+            continue
+        change = after['median_ms'] / before['median_ms'] - 1
+        flag = ''
+        if change > args.threshold:
+            flag = '  SLOWER'
+            regressions += 1
+        elif change < -args.threshold:
+            flag = '  faster'
+        print(f"{name:<40} {before['median_ms']:>10.4f}ms {after['median_ms']:>10.4f}ms {change:>+8.1%}{flag}")
+
+    if regressions:
+        print(f"\n{regressions} benchmark(s) slower by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+def process_pss_bytes() -> Optional[int]:
+    """Proportional set size: shared (e.g. memory-mapped weight) pages split between the processes using them."""
+    try:
+        with open('/proc/self/smaps_rollup', 'r') as f:
+            for line in f:
+                if line.startswith('Pss:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def startup_worker():
+    """Load the recommender, then report its startup once the parent says every worker is up."""
+    os.environ['WEATHERBIT_API_KEY'] = ''
+    os.environ['WEATHER_PREFETCH'] = '0'
+    os.environ['LOG_LEVEL'] = 'WARNING'
+    os.chdir(tempfile.mkdtemp(prefix='moodfood-bench-'))
+    sys.path.insert(0, str(BACKEND_DIR))
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(sys.stderr):
+        from model.mood_food_model import MoodFoodRecommender
+        from model.metrics import process_rss_bytes
+        recommender = MoodFoodRecommender()
+    report = dict(recommender.startup_report, startup_seconds=round(time.perf_counter() - started, 3))
+    print('ready', flush=True)
+    sys.stdin.readline()
+    report.update(rss_bytes=process_rss_bytes(), pss_bytes=process_pss_bytes())
+    print(json.dumps(report), flush=True)
+
+
+def startup(args) -> Dict:
+    """Start args.workers recommender processes together; per-worker startup time and memory."""
+    workers = [subprocess.Popen([sys.executable, __file__, 'startup-worker'], stdin=subprocess.PIPE,
+                                stdout=subprocess.PIPE, text=True) for _ in range(args.workers)]
+    for worker in workers:
+        if worker.stdout.readline().strip() != 'ready':
+            raise RuntimeError(f"startup worker exited with {worker.wait()}")
+    # Memory is read only once every worker holds the model, so shared pages are split between them
+    for worker in workers:
+        worker.stdin.write('\n')
+        worker.stdin.flush()
+    reports = [json.loads(worker.stdout.readline()) for worker in workers]
+    for worker in workers:
+        worker.wait()
+    for report in reports:
+        if 'rss_after_model_bytes' in report:
+            report['model_rss_bytes'] = report['rss_after_model_bytes'] - report['rss_before_model_bytes']
+
+    def summary(key: str, scale: float = 1.0) -> Optional[Dict]:
+        values = [report[key] / scale for report in reports if report.get(key) is not None]
+        if not values:
+            return None
+        return {'median': round(statistics.median(values), 3), 'max': round(max(values), 3)}
+
+    result = {
+        'meta': {'commit': git_commit(), 'python': platform.python_version(), 'platform': platform.platform(),
+                 'workers': args.workers, 'model_source': reports[0].get('model_source', 'keyword')},
+        'startup_seconds': summary('startup_seconds'),
+        'model_load_seconds': summary('model_load_seconds'),
+        'rss_mb': summary('rss_bytes', 2**20),
+        'pss_mb': summary('pss_bytes', 2**20),
+        'model_rss_mb': summary('model_rss_bytes', 2**20)
+    }
+    print(json.dumps(result, indent=2))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mood Food recommender benchmarks')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='run the benchmarks and save results as JSON')
+    run_parser.add_argument('--output', help='result file (default: print to stdout)')
+    run_parser.add_argument('--filter', help='only run benchmarks whose name contains this')
+    run_parser.add_argument('--repeat', type=int, default=7, help='timed rounds per benchmark')
+    run_parser.add_argument('--min-time', type=float, default=0.05, help='minimum seconds per round')
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('--corpus-size', type=int, default=200)
+    run_parser.add_argument('--history-sizes', type=int, nargs='+', default=[0, 100, 1000, 10000])
+    run_parser.add_argument('--model-delay-ms', type=float, default=0,
+                            help='latency added to each stub model call')
+    run_parser.add_argument('--skip-endpoints', action='store_true', help='skip the Flask end-to-end runs')
+
+    compare_parser = subparsers.add_parser('compare', help='compare two result files')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.10,
+                                help='relative median change reported as a regression')
+
+    corpus_parser = subparsers.add_parser('corpus', help='print the synthetic corpus as JSON lines')
+    corpus_parser.add_argument('--size', type=int, default=200)
+    corpus_parser.add_argument('--seed', type=int, default=0)
+
+    startup_parser = subparsers.add_parser('startup', help='time model loading and measure per-worker memory')
+    startup_parser.add_argument('--workers', type=int, default=2, help='worker processes alive at once')
+    subparsers.add_parser('startup-worker', help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        run(args)
+    elif args.command == 'compare':
+        sys.exit(compare(args))
+    elif args.command == 'startup':
+        startup(args)
+    elif args.command == 'startup-worker':
+        startup_worker()
+    else:
+        use_stub_classifier()
+        from model.mood_food_model import MoodFoodRecommender
+        with tempfile.TemporaryDirectory() as scratch, contextlib.redirect_stdout(sys.stderr):
+            os.chdir(scratch)
+            corpus = synthetic_corpus(MoodFoodRecommender().mood_keywords, args.size, args.seed)
+            os.chdir(BACKEND_DIR)
+        for item in corpus:
+            print(json.dumps(item))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""Export the emotion model to a pinned local artifact directory.
+
+Downloads one revision of the model, saves the weights as safetensors next
+to the tokenizer, and writes artifact.json with the revision and file
+checksums. Point the app at the directory to load it offline:
+
+    python export_model.py --revision <commit-sha> --output models/go_emotions
+    EMOTION_MODEL_DIR=models/go_emotions python app.py
+"""
+import argparse
+import datetime
+import json
+from pathlib import Path
+
+from model.artifact import MANIFEST_NAME, sha256
+from model.mood_food_model import EMOTION_MODEL
+
+
+def export(model_id: str, revision: str, output: Path):
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    model = AutoModelForSequenceClassification.from_pretrained(model_id, revision=revision)
+    tokenizer = AutoTokenizer.from_pretrained(model_id, revision=revision)
+    output.mkdir(parents=True, exist_ok=True)
+    model.save_pretrained(output, safe_serialization=True)
+    tokenizer.save_pretrained(output)
+
+    manifest = {
+        'model': model_id,
+        'revision': revision,
+        'exported_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'files': {path.name: sha256(path) for path in sorted(output.iterdir())
+                  if path.is_file() and path.name != MANIFEST_NAME}
+    }
+    with open(output / MANIFEST_NAME, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    print(f"Exported {model_id}@{revision} to {output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the emotion model as a local safetensors artifact')
+    parser.add_argument('--model', default=EMOTION_MODEL)
+    parser.add_argument('--revision', required=True, help='hub commit sha (or tag) to pin')
+    parser.add_argument('--output', type=Path, required=True)
+    args = parser.parse_args()
+    export(args.model, args.revision, args.output)
+
+
+if __name__ == '__main__':
+    main()
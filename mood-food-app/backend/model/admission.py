@@ -0,0 +1,104 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple
+
+# Lanes requests can be admitted on; keyword-path requests may get their own,
+# and batches get a separate, smaller one
+DEFAULT_LANE = 'default'
+PRIORITY_LANE = 'priority'
+BATCH_LANE = 'batch'
+
+
+class Decision(NamedTuple):
+    admitted: bool
+    reason: str = ''
+    retry_after: int = 0
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` tokens per second, holding at most ``burst``."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def consume(self, cost: float = 1) -> float:
+        """Take ``cost`` tokens; returns 0 on success, else seconds until they are available.
+
+        A cost above ``burst`` is let through once the bucket is full and leaves
+        it in debt, so a large request is paid for by a longer wait afterwards.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        needed = min(cost, self.burst)
+        if self.tokens >= needed:
+            self.tokens -= cost
+            return 0.0
+        return (needed - self.tokens) / self.rate if self.rate > 0 else float('inf')
+
+
+class AdmissionController:
+    """Bounds in-flight work and rate-limits clients so overload is shed with fast 429s.
+
+    Each lane has its own in-flight limit, so cheap keyword-path requests on
+    the priority lane keep being admitted while model-path requests saturate
+    the default lane, and batches can't take over either. Per-client token
+    buckets are kept in a bounded LRU; a request costs one token per text.
+    """
+
+    def __init__(self, max_in_flight: int = 32, priority_in_flight: int = 16,
+                 client_rate: float = 5, client_burst: float = 10,
+                 retry_after: int = 1, max_clients: int = 10000, batch_in_flight: int = 2):
+        self.limits = {DEFAULT_LANE: max_in_flight, PRIORITY_LANE: priority_in_flight,
+                       BATCH_LANE: batch_in_flight}
+        self.in_flight = {lane: 0 for lane in self.limits}
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.retry_after = retry_after
+        self.max_clients = max_clients
+        self.rejected = {'rate_limited': 0, 'overloaded': 0}
+        self._buckets: 'OrderedDict[str, TokenBucket]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def try_admit(self, client_id: str, lane: str = DEFAULT_LANE, cost: float = 1) -> Decision:
+        """Admit the request now or reject it; never waits. ``cost`` is the number of texts."""
+        with self._lock:
+            # Capacity first, so work shed for overload doesn't cost the client rate budget
+            if self.in_flight[lane] >= self.limits[lane]:
+                self.rejected['overloaded'] += 1
+                return Decision(False, 'overloaded', self.retry_after)
+            if self.client_rate > 0:
+                wait = self._bucket(client_id).consume(cost)
+                if wait > 0:
+                    self.rejected['rate_limited'] += 1
+                    return Decision(False, 'rate_limited', max(1, math.ceil(wait)))
+            self.in_flight[lane] += 1
+            return Decision(True)
+
+    def release(self, lane: str = DEFAULT_LANE):
+        with self._lock:
+            self.in_flight[lane] = max(0, self.in_flight[lane] - 1)
+
+    def _bucket(self, client_id: str) -> TokenBucket:
+        bucket = self._buckets.get(client_id)
+        if bucket is None:
+            bucket = TokenBucket(self.client_rate, self.client_burst)
+            self._buckets[client_id] = bucket
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client_id)
+        return bucket
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'in_flight': dict(self.in_flight),
+                'limits': dict(self.limits),
+                'rejected': dict(self.rejected)
+            }
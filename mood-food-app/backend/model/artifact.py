@@ -0,0 +1,40 @@
+"""Checksums for local model artifact directories (see export_model.py)."""
+import hashlib
+import json
+from pathlib import Path
+
+MANIFEST_NAME = 'artifact.json'
+
+
+def sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def verify_artifact(model_dir) -> dict:
+    """Check the directory's safetensors weights against artifact.json; returns the manifest.
+
+    Raises ValueError when the manifest is missing, lists no weights, or a
+    weights file is missing or doesn't match its recorded checksum.
+    """
+    model_dir = Path(model_dir)
+    try:
+        with open(model_dir / MANIFEST_NAME, 'r') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        raise ValueError(f"{model_dir} has no {MANIFEST_NAME}; export it with export_model.py")
+
+    weights = {name: checksum for name, checksum in manifest.get('files', {}).items()
+               if name.endswith('.safetensors')}
+    if not weights:
+        raise ValueError(f"{model_dir / MANIFEST_NAME} lists no safetensors files")
+    for name, checksum in weights.items():
+        path = model_dir / name
+        if not path.is_file():
+            raise ValueError(f"{path} is listed in {MANIFEST_NAME} but missing")
+        if sha256(path) != checksum:
+            raise ValueError(f"{path} does not match the checksum in {MANIFEST_NAME}")
+    return manifest
@@ -0,0 +1,81 @@
+import asyncio
+from typing import Callable, List, Optional, Set
+
+
+class InferenceBatcher:
+    """Coalesces concurrent single-text model calls into batched calls.
+
+    Must be created and used on one long-lived event loop. Callers await
+    ``classify(text)``; a collector task gathers up to ``max_batch_size``
+    queued texts (waiting at most ``max_wait`` seconds after the first) and
+    runs them through ``classify_batch`` on ``run_blocking`` in a single call.
+    """
+
+    def __init__(self, classify_batch: Callable[[List[str]], List], run_blocking: Callable,
+                 max_batch_size: int = 16, max_wait: float = 0.005):
+        self.classify_batch = classify_batch
+        self.run_blocking = run_blocking
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        # Running batches; the loop only keeps weak references to tasks
+        self._running: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.items = 0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._collect())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Let batches already sent to the model deliver their results
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    async def classify(self, text: str) -> List:
+        """Emotion scores for one text, in the same shape as a single pipeline call."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Callers that gave up (deadline exceeded) don't need a result
+            batch = [(text, future) for text, future in batch if not future.cancelled()]
+            if batch:
+                task = loop.create_task(self._run(batch))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch):
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            results = await self.run_blocking(self.classify_batch, [text for text, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), scores in zip(batch, results):
+            if not future.done():
+                future.set_result([scores])
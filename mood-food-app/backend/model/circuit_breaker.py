@@ -0,0 +1,98 @@
+import threading
+import time
+from collections import deque
+from typing import Dict
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit is open."""
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker with closed, open and half-open states.
+
+    While closed, outcomes are kept in a rolling window; once at least
+    ``min_calls`` are recorded and the failure rate reaches ``failure_threshold``
+    the circuit opens and callers are rejected without touching the network.
+    After ``cooldown`` seconds a single probe is let through (half-open): a
+    success closes the circuit, a failure re-opens it for another cooldown.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: float = 0.5, window_size: int = 20,
+                 min_calls: int = 5, cooldown: float = 30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self._outcomes = deque(maxlen=window_size)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def allow_request(self) -> bool:
+        """Whether a call may go to the provider right now."""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._state = self.CLOSED
+                self._outcomes.clear()
+                self._probe_in_flight = False
+            self._outcomes.append(True)
+
+    def record_failure(self):
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._trip()
+                return
+            self._outcomes.append(False)
+            if len(self._outcomes) >= self.min_calls and self._failure_rate() >= self.failure_threshold:
+                self._trip()
+
+    def _trip(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+        self._outcomes.clear()
+
+    def _failure_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    def snapshot(self) -> Dict:
+        """Current state for health reporting."""
+        with self._lock:
+            state = self._current_state()
+            snapshot = {
+                'state': state,
+                'failure_rate': round(self._failure_rate(), 3),
+                'recent_calls': len(self._outcomes)
+            }
+            if state == self.OPEN:
+                snapshot['retry_in'] = round(self.cooldown - (time.monotonic() - self._opened_at), 1)
+            return snapshot
@@ -0,0 +1,59 @@
+import os
+import time
+from typing import Dict, List, Optional
+
+# Per-stage latency budgets in seconds, overridable with STAGE_BUDGET_<STAGE>. Only
+# stages that await blocking work can be cut off; keyword matching and scoring are
+# short CPU-bound steps that are timed but not budgeted (scoring is skipped once
+# the request deadline itself has passed).
+DEFAULT_BUDGETS = {
+    'model': 1.0,
+    'weather': 0.8
+}
+
+# Total time a request may take, overridable with REQUEST_DEADLINE
+DEFAULT_TIMEOUT = 2.0
+
+
+def budgets_from_env() -> Dict[str, float]:
+    """Stage budgets with any STAGE_BUDGET_<STAGE> environment overrides applied."""
+    return {
+        stage: float(os.getenv(f'STAGE_BUDGET_{stage.upper()}', budget))
+        for stage, budget in DEFAULT_BUDGETS.items()
+    }
+
+
+class Deadline:
+    """Request-wide deadline that hands each stage the smaller of its budget and the time left.
+
+    Stages that run out of time call ``degrade`` and fall back to a cheaper
+    answer; the degraded stage names are reported back to the client.
+    """
+
+    def __init__(self, timeout: float = None, budgets: Optional[Dict[str, float]] = None):
+        if timeout is None:
+            timeout = float(os.getenv('REQUEST_DEADLINE', DEFAULT_TIMEOUT))
+        self.started = time.monotonic()
+        self.expires_at = self.started + timeout
+        self.budgets = budgets if budgets is not None else budgets_from_env()
+        self.degraded: List[str] = []
+        self.timings: Dict[str, float] = {}
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def budget(self, stage: str) -> float:
+        """Seconds the stage may spend, capped by what is left of the request."""
+        return min(self.budgets.get(stage, float('inf')), self.remaining())
+
+    def degrade(self, stage: str):
+        if stage not in self.degraded:
+            self.degraded.append(stage)
+
+    def record(self, stage: str, started: float):
+        """Record how long a stage took, in seconds."""
+        self.timings[stage] = time.monotonic() - started
@@ -0,0 +1,50 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from model.metrics import EXECUTOR_REJECTIONS
+
+
+class ExecutorSaturatedError(Exception):
+    """Raised instead of queueing a call when the executor already has its limit pending."""
+
+
+class BoundedExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor that rejects submissions beyond ``max_pending`` running or queued calls.
+
+    A call abandoned by a deadline keeps its worker thread until it returns,
+    and a plain executor queues every later call behind it without limit. A
+    slot is held here from submit until the call finishes (or is cancelled
+    before it starts), so once abandoned work piles up new calls fail fast
+    and their stage falls back instead of waiting out the request deadline.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int = None, thread_name_prefix: str = ''):
+        super().__init__(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self.max_pending = max_pending or 2 * max_workers
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        if not self._slots.acquire(blocking=False):
+            EXECUTOR_REJECTIONS.inc(executor=self._thread_name_prefix)
+            raise ExecutorSaturatedError(f"{self.max_pending} calls already pending")
+        try:
+            future = super().submit(fn, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._pending_lock:
+            self._pending += 1
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future: Future):
+        with self._pending_lock:
+            self._pending -= 1
+        self._slots.release()
+
+    @property
+    def pending(self) -> int:
+        """Calls running or queued, including ones their caller has given up on."""
+        return self._pending
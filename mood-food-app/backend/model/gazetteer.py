@@ -0,0 +1,168 @@
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# Bundled city table shipped alongside the model code
+CITIES_FILE = Path(__file__).parent / "data" / "cities.tsv"
+
+
+class City(NamedTuple):
+    name: str
+    country: str
+    lat: float
+    lon: float
+
+    @property
+    def display_name(self) -> str:
+        return f"{self.name}, {self.country}"
+
+    def bucket(self, precision: int = 1) -> Tuple[float, float]:
+        """Round coordinates so nearby lookups share a weather bucket."""
+        return (round(self.lat, precision), round(self.lon, precision))
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase, strip accents and punctuation so lookups are forgiving."""
+    decomposed = unicodedata.normalize('NFKD', name)
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    cleaned = ''.join(c if c.isalnum() else ' ' for c in stripped.lower())
+    return ' '.join(cleaned.split())
+
+
+class _TrieNode:
+    __slots__ = ('children', 'cities')
+
+    def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.cities: List[City] = []
+
+
+class Gazetteer:
+    """Offline city index with exact lookup, plus prefix and fuzzy suggestions.
+
+    lookup() only trusts exact names and aliases. A prefix or a close
+    spelling may just as well be a real place the table doesn't have ("Hyde"
+    is not Hyderabad, "York" is not Cork), so those matches come from
+    suggest() and are never used to resolve a location on their own.
+    """
+
+    # Fuzzy suggestions: no typo tolerance below the first key length, then one
+    # edit, then two edits from the second length on
+    FUZZY_MIN_LENGTH = 6
+    FUZZY_TWO_EDITS_LENGTH = 10
+
+    def __init__(self, cities: List[Tuple[str, City]]):
+        self._exact: Dict[str, List[City]] = {}
+        self._root = _TrieNode()
+        for key, city in cities:
+            self._exact.setdefault(key, []).append(city)
+            node = self._root
+            for char in key:
+                node = node.children.setdefault(char, _TrieNode())
+            node.cities.append(city)
+
+    @classmethod
+    def from_file(cls, path: Path = CITIES_FILE) -> 'Gazetteer':
+        """Build the index from a tab-separated city file."""
+        entries = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip() or line.startswith('#'):
+                    continue
+                name, country, lat, lon, aliases = (line.rstrip('\n').split('\t') + [''])[:5]
+                city = City(name, country, float(lat), float(lon))
+                entries.append((normalize_name(name), city))
+                for alias in filter(None, aliases.split(',')):
+                    entries.append((normalize_name(alias), city))
+        return cls(entries)
+
+    def __len__(self) -> int:
+        return len(self._exact)
+
+    def lookup(self, query: str) -> Optional[City]:
+        """Resolve a free-form location to a known city, or None if there is no good match."""
+        name, country = self._split_country(query)
+        key = normalize_name(name)
+        if not key:
+            return None
+
+        # Exact name or alias
+        return self._pick(self._exact.get(key, []), country)
+
+    def suggest(self, query: str) -> Optional[City]:
+        """Known city a partial or misspelled location may mean, if there is exactly one; never authoritative."""
+        name, country = self._split_country(query)
+        key = normalize_name(name)
+
+        # Unambiguous prefix ("san fran" -> San Francisco)
+        if len(key) >= 3:
+            match = self._pick(self._prefix(key), country, unique=True)
+            if match:
+                return match
+
+        if len(key) < self.FUZZY_MIN_LENGTH:
+            return None
+        max_distance = 1 if len(key) < self.FUZZY_TWO_EDITS_LENGTH else 2
+        candidates = self._fuzzy(key, max_distance)
+        if not candidates:
+            return None
+        best = min(distance for distance, _ in candidates)
+        return self._pick([city for distance, city in candidates if distance == best], country, unique=True)
+
+    def _split_country(self, query: str) -> Tuple[str, Optional[str]]:
+        """Split an optional trailing ISO country code, e.g. 'Pune, IN'."""
+        if ',' in query:
+            name, _, suffix = query.rpartition(',')
+            suffix = suffix.strip()
+            if len(suffix) == 2 and suffix.isalpha():
+                return name, suffix.upper()
+        return query, None
+
+    def _pick(self, cities: List[City], country: Optional[str], unique: bool = False) -> Optional[City]:
+        if country:
+            cities = [city for city in cities if city.country == country]
+        cities = list(dict.fromkeys(cities))
+        if not cities or (unique and len(cities) > 1):
+            return None
+        return cities[0]
+
+    def _prefix(self, key: str) -> List[City]:
+        node = self._root
+        for char in key:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        found = []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            found.extend(current.cities)
+            stack.extend(current.children.values())
+        return found
+
+    def _fuzzy(self, key: str, max_distance: int) -> List[Tuple[int, City]]:
+        """Levenshtein search over the trie, pruning branches that exceed max_distance."""
+        results = []
+        first_row = list(range(len(key) + 1))
+
+        def walk(node: _TrieNode, char: str, previous_row: List[int]):
+            row = [previous_row[0] + 1]
+            for i in range(1, len(key) + 1):
+                cost = 0 if key[i - 1] == char else 1
+                row.append(min(row[i - 1] + 1, previous_row[i] + 1, previous_row[i - 1] + cost))
+            if row[-1] <= max_distance and node.cities:
+                results.extend((row[-1], city) for city in node.cities)
+            if min(row) <= max_distance:
+                for next_char, child in node.children.items():
+                    walk(child, next_char, row)
+
+        for char, child in self._root.children.items():
+            walk(child, char, first_row)
+        return results
+
+
+@lru_cache(maxsize=1)
+def get_gazetteer() -> Gazetteer:
+    """Load the bundled gazetteer once per process."""
+    return Gazetteer.from_file()
@@ -0,0 +1,74 @@
+"""Tiny lexicon-based emotion scorer for the keyword-only mode.
+
+Stands in for the transformers pipeline when the model cannot be loaded:
+it takes the same inputs and returns scores in the same shape, using
+go_emotions labels, so interpret_emotions and the compound patterns work
+unchanged. Pure Python with no imports beyond the standard library.
+"""
+import json
+import re
+from typing import Dict, List
+
+# go_emotions label -> words that suggest it
+DEFAULT_LEXICON = {
+    'joy': ['good', 'great', 'nice', 'fun', 'lovely', 'awesome', 'yay', 'smile', 'sunshine', 'best'],
+    'sadness': ['bad', 'awful', 'terrible', 'cry', 'crying', 'tears', 'lost', 'hurt', 'rough', 'blue'],
+    'love': ['adore', 'sweetheart', 'crush', 'hug', 'kiss', 'valentine', 'anniversary'],
+    'anger': ['angry', 'mad', 'furious', 'annoyed', 'hate', 'rage', 'irritated', 'fed'],
+    'fear': ['scared', 'afraid', 'terrified', 'panic', 'dread', 'frightened'],
+    'nervousness': ['interview', 'exam', 'presentation', 'jittery', 'uneasy', 'restless'],
+    'excitement': ['party', 'finally', 'weekend', 'trip', 'vacation', 'concert', 'celebrate', 'pumped'],
+    'gratitude': ['thanks', 'thank', 'grateful', 'thankful', 'appreciate', 'blessed'],
+    'pride': ['proud', 'won', 'promotion', 'promoted', 'nailed', 'passed', 'achieved'],
+    'optimism': ['hope', 'hopeful', 'looking', 'forward', 'better', 'soon'],
+    'disappointment': ['missed', 'cancelled', 'canceled', 'failed', 'late', 'ruined', 'meh'],
+    'relief': ['relieved', 'phew', 'over', 'done', 'survived'],
+    'amusement': ['funny', 'hilarious', 'laugh', 'laughing', 'lol', 'joke'],
+    'surprise': ['wow', 'unexpected', 'surprised', 'suddenly', 'shocked'],
+    'curiosity': ['wonder', 'curious', 'new', 'try', 'explore'],
+    'confusion': ['confused', 'unsure', 'weird', 'strange', 'lost'],
+    'boredom': ['bored', 'boring', 'nothing', 'dull', 'same'],
+    'tiredness': ['long', 'late', 'yawn', 'night', 'shift', 'weary'],
+}
+
+WORD_PATTERN = re.compile(r"[a-z']+")
+
+
+class LexiconScorer:
+    """Callable with the text-classification pipeline's interface and output shape."""
+
+    def __init__(self, lexicon: Dict[str, List[str]] = None, top_k: int = 3):
+        self.top_k = top_k
+        lexicon = DEFAULT_LEXICON if lexicon is None else lexicon
+        self.labels = tuple(lexicon)
+        # Reverse index: word -> labels it counts towards
+        self.index: Dict[str, List[str]] = {}
+        for label, words in lexicon.items():
+            for word in words:
+                self.index.setdefault(word.lower(), []).append(label)
+
+    @classmethod
+    def from_file(cls, path: str, top_k: int = 3) -> 'LexiconScorer':
+        """Load a JSON object mapping labels to word lists."""
+        with open(path, 'r') as f:
+            return cls(json.load(f), top_k)
+
+    def score(self, text: str) -> List[Dict]:
+        """Top labels by share of matched words; neutral when nothing matches."""
+        counts: Dict[str, int] = {}
+        for word in WORD_PATTERN.findall(text.lower()):
+            for label in self.index.get(word, ()):
+                counts[label] = counts.get(label, 0) + 1
+        if not counts:
+            return [{'label': 'neutral', 'score': 1.0}]
+
+        total = sum(counts.values())
+        ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:self.top_k]
+        # Damp single-word evidence so one hit doesn't look like a confident prediction
+        return [{'label': label, 'score': count / total * min(1.0, 0.5 + 0.25 * count)}
+                for label, count in ranked]
+
+    def __call__(self, texts, **kwargs):
+        if isinstance(texts, str):
+            texts = [texts]
+        return [self.score(text) for text in texts]
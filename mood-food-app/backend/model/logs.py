@@ -0,0 +1,203 @@
+"""Structured, non-blocking logging for the API.
+
+Request threads only put records on a bounded in-memory queue; a listener
+thread formats and writes them, so a slow terminal, pipe or disk never adds
+request latency. If the queue is full the record is dropped and counted
+rather than blocking. Every record carries the correlation id of the request
+that produced it (bound with bind_request_id), and high-volume debug records
+can be sampled per request.
+
+Configured from the environment by configure_logging():
+
+    LOG_LEVEL              minimum level (INFO)
+    LOG_FORMAT             'json' (one object per line) or 'text'
+    LOG_STREAM             'stdout' or 'stderr'
+    LOG_QUEUE_SIZE         records buffered before dropping (10000)
+    LOG_DEBUG_SAMPLE_RATE  fraction of requests whose DEBUG records are kept (1.0)
+"""
+import atexit
+import datetime
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import uuid
+import zlib
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from model.metrics import LOG_RECORDS_DROPPED
+
+_request_id: ContextVar[Optional[str]] = ContextVar('moodfood_request_id', default=None)
+
+# Attributes every LogRecord has; anything else was passed via extra= and is logged as a field
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'request_id'}
+
+_listener: Optional['DrainingQueueListener'] = None
+_settings: Dict = {}
+_configure_lock = threading.Lock()
+
+
+def bind_request_id(request_id: Optional[str] = None) -> str:
+    """Set the correlation id for the current context (a new one if not given) and return it."""
+    request_id = request_id or uuid.uuid4().hex[:12]
+    _request_id.set(request_id)
+    return request_id
+
+
+def current_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamps records with the request id; runs in the calling thread, before queueing."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        return True
+
+
+class DebugSamplingFilter(logging.Filter):
+    """Keeps DEBUG records for a fraction of requests, all or nothing per request id."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.threshold = int(max(0.0, min(1.0, rate)) * 10000)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.threshold >= 10000:
+            return True
+        request_id = getattr(record, 'request_id', None)
+        bucket = zlib.crc32(request_id.encode()) % 10000 if request_id else random.randrange(10000)
+        return bucket < self.threshold
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records instead of blocking when the queue is full."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render the message and traceback now, while args and frames are still what they were,
+        # but leave the formatting (and the extra fields) to the listener thread
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc(level=record.levelname)
+
+
+class DrainingQueueListener(logging.handlers.QueueListener):
+    """QueueListener whose stop() waits for room in a full queue, writing what is buffered."""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+class ConsoleHandler(logging.StreamHandler):
+    """Writes to whatever sys.stdout/sys.stderr is at emit time, so redirections are honoured."""
+
+    def __init__(self, stream_name: str = 'stdout'):
+        self.stream_name = stream_name
+        super().__init__()
+
+    @property
+    def stream(self):
+        return getattr(sys, self.stream_name)
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, request id, message and extra fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(
+                timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'request_id': getattr(record, 'request_id', None),
+            'message': record.getMessage()
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES})
+        if record.exc_text or record.exc_info:
+            entry['exception'] = record.exc_text or self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines with the request id and extra fields appended."""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)-7s %(name)s [%(request_id)s] %(message)s')
+
+    def format(self, record: logging.LogRecord) -> str:
+        record.request_id = getattr(record, 'request_id', None) or '-'
+        line = super().format(record)
+        fields = {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+        if fields:
+            line += ' ' + ' '.join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+
+def configure_logging(level: str = None, log_format: str = None, stream: str = None,
+                      queue_size: int = None, debug_sample_rate: float = None):
+    """Route the root logger through the queue; later calls are no-ops."""
+    with _configure_lock:
+        if _listener is not None:
+            return
+        if debug_sample_rate is None:
+            debug_sample_rate = float(os.getenv('LOG_DEBUG_SAMPLE_RATE', 1.0))
+        _settings.update(
+            level=(level or os.getenv('LOG_LEVEL', 'INFO')).upper(),
+            log_format=log_format or os.getenv('LOG_FORMAT', 'json'),
+            stream=stream or os.getenv('LOG_STREAM', 'stdout'),
+            queue_size=queue_size or int(os.getenv('LOG_QUEUE_SIZE', 10000)),
+            debug_sample_rate=debug_sample_rate
+        )
+        _start_listener()
+        atexit.register(_stop_listener)
+        # The listener thread doesn't survive fork (e.g. gunicorn --preload workers)
+        os.register_at_fork(after_in_child=_restart_in_child)
+
+
+def _start_listener():
+    global _listener
+    console = ConsoleHandler(_settings['stream'])
+    console.setFormatter(JsonFormatter() if _settings['log_format'] == 'json' else TextFormatter())
+
+    # Filters run on the handler in the caller's thread, where the request context is
+    handler = DroppingQueueHandler(queue.Queue(_settings['queue_size']))
+    handler.addFilter(RequestContextFilter())
+    handler.addFilter(DebugSamplingFilter(_settings['debug_sample_rate']))
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(_settings['level'])
+    _listener = DrainingQueueListener(handler.queue, console, respect_handler_level=True)
+    _listener.start()
+
+
+def _stop_listener():
+    if _listener is not None:
+        _listener.stop()
+
+
+def _restart_in_child():
+    # A fresh queue too: the parent's may hold its records, or a lock taken mid-fork
+    global _configure_lock
+    _configure_lock = threading.Lock()
+    if _listener is not None:
+        _start_listener()
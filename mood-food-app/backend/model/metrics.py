@@ -0,0 +1,206 @@
+"""Minimal in-process metrics rendered in the Prometheus text exposition format.
+
+Recording is a dict lookup and a couple of additions under a lock, so it is
+cheap enough to leave on in the request path.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+_registry: List['_Metric'] = []
+
+
+def _format_labels(names: Sequence[str], values: Tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple:
+        return tuple(labels.get(name, '') for name in self.label_names)
+
+    def render(self) -> List[str]:
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for key, value in sorted(self._values.items()):
+            lines.append(f'{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}')
+        return lines
+
+
+class Gauge(_Metric):
+    """Gauge whose value is read from a callback at scrape time."""
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], float]):
+        super().__init__(name, documentation)
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        return super().render() + [f'{self.name} {_format_value(self.callback())}']
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets) + (float('inf'),)
+        # key -> [per-bucket counts..., sum, count]
+        self._values: Dict[Tuple, List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for key, series in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}')
+            labels = _format_labels(self.label_names, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(series[-2])}')
+            lines.append(f'{self.name}_count{labels} {series[-1]}')
+        return lines
+
+
+def process_rss_bytes() -> float:
+    """Current resident set size; falls back to peak RSS where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except ImportError:
+        # Windows has neither /proc nor resource
+        return 0
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+STAGE_LATENCY = Histogram(
+    'moodfood_stage_latency_seconds',
+    'Latency of recommendation stages (keywords, model, weather, scoring, persistence).',
+    ['stage']
+)
+MOOD_PATH = Counter(
+    'moodfood_mood_path_total',
+    'How analyze_mood settled the mood: keyword, model, compound pattern or distribution.',
+    ['path']
+)
+WEATHER_CACHE_LOOKUPS = Counter(
+    'moodfood_weather_cache_lookups_total',
+    'Weather cache lookups by result.',
+    ['result']
+)
+EXECUTOR_REJECTIONS = Counter(
+    'moodfood_executor_rejections_total',
+    'Blocking calls rejected because the worker pool already had its limit pending.',
+    ['executor']
+)
+RECOMMENDATION_CACHE_LOOKUPS = Counter(
+    'moodfood_recommendation_cache_lookups_total',
+    'Ranked food lookups in get_food_recommendations by result.',
+    ['result']
+)
+BATCH_SIZE = Histogram(
+    'moodfood_inference_batch_size',
+    'Number of texts per emotion model call.',
+    ['source'],
+    buckets=SIZE_BUCKETS
+)
+
+MODEL_RELOADS = Counter(
+    'moodfood_model_reloads_total',
+    'Hot emotion model reloads by result.',
+    ['result']
+)
+SESSIONS = Counter(
+    'moodfood_chat_sessions_total',
+    'Chat mood sessions started, expired after inactivity, or evicted at capacity.',
+    ['event']
+)
+LOG_RECORDS_DROPPED = Counter(
+    'moodfood_log_records_dropped_total',
+    'Log records dropped because the logging queue was full.',
+    ['level']
+)
+
+
+def _weather_cache_hit_ratio() -> float:
+    hits = WEATHER_CACHE_LOOKUPS.value(result='hit')
+    total = hits + WEATHER_CACHE_LOOKUPS.value(result='miss')
+    return hits / total if total else 0.0
+
+
+Gauge('moodfood_weather_cache_hit_ratio', 'Fraction of weather lookups served from cache.',
+      _weather_cache_hit_ratio)
+Gauge('moodfood_process_resident_memory_bytes', 'Resident memory of this worker process.',
+      process_rss_bytes)
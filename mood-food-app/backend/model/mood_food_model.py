@@ -1,330 +1,347 @@
 import os
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import random
 import json
 import datetime
+import time
 import requests
 import asyncio
+import contextvars
+import gc
+import logging
+import threading
+from contextlib import contextmanager
+from functools import partial
 from pathlib import Path
 from dotenv import load_dotenv
-from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
+from model.gazetteer import get_gazetteer, normalize_name
+from model.weather_cache import WeatherCache
+from model.weather_normalize import normalize_weather, normalize_weather_batch
+from model.deadline import Deadline
+from model.circuit_breaker import CircuitBreaker, CircuitOpenError
+from model.executor import BoundedExecutor, ExecutorSaturatedError
+from model.metrics import (BATCH_SIZE, MODEL_RELOADS, MOOD_PATH, RECOMMENDATION_CACHE_LOOKUPS, STAGE_LATENCY,
+                           process_rss_bytes)
+from model.artifact import verify_artifact
+from model.lexicon import LexiconScorer
+from model.persistence import atomic_write_text
+from model.rules import get_rules
+from model.session_mood import SessionMoodTracker
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Warm-up inputs: one sentence cut to short, typical and long request lengths (in words)
+WARMUP_SENTENCE = ("I had a long day at work and the weather turned cold on the way home, "
+                   "so I am tired but also a little excited about the weekend plans")
+WARMUP_LENGTHS = (8, 32, 128)
+
+EMOTION_MODEL = "SamLowe/roberta-base-go_emotions"
+
+def pipeline(*args, **kwargs):
+    """transformers.pipeline, imported on first use so keyword-only mode never loads it."""
+    from transformers import pipeline as transformers_pipeline
+    return transformers_pipeline(*args, **kwargs)
+
+def load_emotion_pipeline(model_dir: str = None, top_k: Optional[int] = 3):
+    """Emotion pipeline from the hub cache, or from a local safetensors artifact directory.
+    
+    A local directory (see export_model.py) has its safetensors checksums
+    verified against artifact.json, then is read with local_files_only and
+    memory-mapped safetensors, so startup never touches the network.
+    """
+    if not model_dir:
+        return pipeline("text-classification", model=EMOTION_MODEL, top_k=top_k)
+    
+    manifest = verify_artifact(model_dir)
+    logger.info("Verified model artifact %s@%s", manifest.get('model'), manifest.get('revision'))
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+    model = AutoModelForSequenceClassification.from_pretrained(
+        model_dir, local_files_only=True, use_safetensors=True
+    )
+    model.eval()
+    tokenizer = AutoTokenizer.from_pretrained(model_dir, local_files_only=True)
+    return pipeline("text-classification", model=model, tokenizer=tokenizer, top_k=top_k)
+
 class MoodFoodRecommender:
     def __init__(self):
-        # Initialize sentiment analyzer using Transformers
-        print("Loading emotion detection model...")
-        self.sentiment_analyzer = pipeline(
-            "text-classification",
-            model="SamLowe/roberta-base-go_emotions",
-            top_k=3
-        )
+        # 'model' uses the roberta go_emotions model; 'keyword' never imports
+        # transformers/torch and backs the keyword logic with a lexicon scorer
+        self.analyzer_mode = os.getenv('MOOD_ANALYZER', 'model')
+        self.model_dir = os.getenv('EMOTION_MODEL_DIR')
+        # 'rules' picks a mood from the top three emotions; 'distribution' keeps all
+        # labels and projects them onto moods (see model/mood_projection.py)
+        self.mood_scoring = os.getenv('MOOD_SCORING', 'rules')
+        self.emotion_top_k = None if self.mood_scoring == 'distribution' else 3
+        # Texts per forward pass; the pipeline runs them one at a time unless told otherwise
+        self.model_batch_size = max(1, int(os.getenv('MODEL_BATCH_SIZE', 32)))
+        self.startup_report: Dict = {'rss_before_model_bytes': process_rss_bytes()}
+        if self.analyzer_mode == 'keyword':
+            logger.info("Keyword-only mode: emotion model disabled")
+            self.sentiment_analyzer = self.load_lexicon_scorer()
+        else:
+            # Initialize sentiment analyzer using Transformers
+            logger.info("Loading emotion detection model...")
+            started = time.perf_counter()
+            self.sentiment_analyzer = load_emotion_pipeline(self.model_dir, self.emotion_top_k)
+            self.startup_report['model_source'] = self.model_dir or EMOTION_MODEL
+            self.startup_report['model_load_seconds'] = round(time.perf_counter() - started, 3)
+            self.startup_report['rss_after_model_bytes'] = process_rss_bytes()
+            logger.info("Emotion model loaded in %ss (RSS %.0f MB)", self.startup_report['model_load_seconds'],
+                        self.startup_report['rss_after_model_bytes'] / 2**20)
         
-        # Initialize data storage
+        # Initialize data storage. Writers hold _user_lock and replace (rather than
+        # append to) per-mood preference lists, so readers can iterate without it.
         self.data_file = Path("user_data.json")
+        self._user_lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._user_data_version = 0
+        self._saved_version = 0
         self.user_data = self.load_user_data()
         
-        # Negation words that can reverse the emotion
-        self.negation_words = ['not', "don't", "doesn't", "didn't", "won't", "wouldn't", "couldn't", "can't", "never", "no"]
-        
-        # Emotional context phrases
-        self.emotional_context = {
-            'lazy': {
-                'positive_context': ['relaxing', 'chilling', 'taking it easy', 'unwinding'],
-                'negative_context': ['procrastinating', 'wasting time', 'being unproductive']
-            },
-            'romantic': {
-                'positive_context': ['date night', 'special occasion', 'quality time', 'together'],
-                'negative_context': ['lonely', 'missing someone', 'long distance']
-            },
-            'happy': {
-                'positive_context': ['celebration', 'achievement', 'success', 'good news'],
-                'negative_context': ['trying to be happy', 'forcing a smile', 'pretending']
-            },
-            'sad': {
-                'positive_context': ['missing someone', 'memories', 'nostalgia'],
-                'negative_context': ['depression', 'hopelessness', 'despair']
-            },
-            'energetic': {
-                'positive_context': ['workout', 'exercise', 'activity', 'movement'],
-                'negative_context': ['hyper', 'restless', 'can\'t sit still']
-            },
-            'stressed': {
-                'positive_context': ['busy', 'productive', 'challenging'],
-                'negative_context': ['overwhelmed', 'burned out', 'exhausted']
-            },
-            'productive': {
-                'positive_context': ['accomplishment', 'progress', 'achievement'],
-                'negative_context': ['overworking', 'burnout', 'exhaustion']
-            }
-        }
+        # Ranked foods per (mood, temperature category, season, preference version);
+        # scoring only reads those, so identical requests skip it. Cleared whenever
+        # the preferences change.
+        self._preferences_version = 0
+        self._ranked_foods: Dict[Tuple, Tuple[str, ...]] = {}
+        
+        # Immutable rule tables shared by every recommender in the process
+        self.rules = get_rules()
+        self.negation_words = self.rules.negation_words
+        self.emotional_context = self.rules.emotional_context
+        self.food_mood_mapping = self.rules.food_mood_mapping
+        self.emotion_mood_mapping = self.rules.emotion_mood_mapping
+        self.weather_food_adjustments = self.rules.weather_food_adjustments
+        self.mood_keywords = self.rules.mood_keywords
+        self.compound_patterns = self.rules.compound_patterns
+        self.seasonal_preferences = self.rules.seasonal_preferences
+        self.temperature_adjustments = self.rules.temperature_adjustments
+        self.projection = None
+        if self.mood_scoring == 'distribution':
+            # Imported here so the default mode doesn't load NumPy
+            from model.mood_projection import MoodProjection
+            self.projection = MoodProjection(self.rules)
+            if self.analyzer_mode == 'keyword':
+                unknown = sorted(set(self.sentiment_analyzer.labels) - set(self.projection.labels))
+                if unknown:
+                    raise ValueError(f"Lexicon labels with no mood mapping: {', '.join(unknown)}")
         
         # Weatherbit API configuration
         self.weatherbit_api_key = os.getenv('WEATHERBIT_API_KEY')
         if not self.weatherbit_api_key:
-            print("Warning: WEATHERBIT_API_KEY not found in environment variables.")
-            print("Weather-based recommendations will be disabled.")
+            logger.warning("WEATHERBIT_API_KEY not found in environment variables; "
+                           "weather-based recommendations will be disabled")
             self.user_data['weather_enabled'] = False
             self.save_user_data()
         
-        self.weatherbit_base_url = "https://api.weatherbit.io/v2.0"
-        
-        # Enhanced food categories and their mood associations
-        self.food_mood_mapping = {
-            'happy': [
-                'Colorful Mediterranean salad with feta and olives',
-                'Fresh fruit smoothie bowl with granola',
-                'Light pasta primavera with fresh vegetables',
-                'Grilled chicken with mango salsa',
-                'Rainbow sushi roll'
-            ],
-            'sad': [
-                'Creamy mac and cheese',
-                'Warm chicken noodle soup',
-                'Chocolate lava cake',
-                'Mashed potatoes with gravy',
-                'Warm bread with butter'
-            ],
-            'energetic': [
-                'Quinoa power bowl with grilled chicken',
-                'Whole grain toast with avocado and eggs',
-                'Fresh vegetable stir-fry with tofu',
-                'Protein-rich Greek yogurt parfait',
-                'Grilled salmon with brown rice'
-            ],
-            'tired': [
-                'Energy-boosting green smoothie',
-                'Mixed nuts and dried fruits trail mix',
-                'Green tea with honey',
-                'Banana and peanut butter toast',
-                'Dark chocolate covered almonds'
-            ],
-            'stressed': [
-                'Calming chamomile tea with honey',
-                'Dark chocolate with sea salt',
-                'Lavender-infused cookies',
-                'Green tea and matcha latte',
-                'Anti-stress berry smoothie'
-            ],
-            'romantic': [
-                'Classic spaghetti carbonara',
-                'Chocolate-covered strawberries',
-                'French onion soup',
-                'Red wine braised beef',
-                'Crème brûlée'
-            ],
-            'productive': [
-                'Brain-boosting blueberry oatmeal',
-                'Grilled chicken with quinoa',
-                'Salmon with sweet potato',
-                'Greek yogurt with granola',
-                'Mixed berry protein smoothie'
-            ],
-            'lazy': [
-                'One-pot pasta dish',
-                'Sheet pan chicken and vegetables',
-                '5-minute microwave mug cake',
-                'Quick tuna salad wrap',
-                'Easy breakfast burrito'
-            ],
-            'neutral': [
-                'Classic club sandwich',
-                'Caesar salad with grilled chicken',
-                'Margherita pizza',
-                'Turkey and cheese wrap',
-                'Mixed green salad'
-            ]
-        }
+        # Overridable so benchmarks and integration tests can target a local stub
+        self.weatherbit_base_url = os.getenv("WEATHERBIT_BASE_URL", "https://api.weatherbit.io/v2.0").rstrip("/")
         
-        # Emotion to mood mapping
-        self.emotion_mood_mapping = {
-            # Positive emotions
-            'joy': 'happy',
-            'love': 'romantic',
-            'pride': 'productive',
-            'gratitude': 'happy',
-            'optimism': 'productive',
-            'amusement': 'happy',
-            'excitement': 'energetic',
-            'desire': 'romantic',
-            'admiration': 'romantic',
-            'relief': 'happy',
-            
-            # Negative emotions
-            'sadness': 'sad',
-            'anger': 'stressed',
-            'fear': 'stressed',
-            'disgust': 'stressed',
-            'remorse': 'sad',
-            'grief': 'sad',
-            'anxiety': 'stressed',
-            'nervousness': 'stressed',
-            'disappointment': 'sad',
-            'embarrassment': 'stressed',
-            
-            # Neutral/Complex emotions
-            'surprise': 'energetic',
-            'confusion': 'stressed',
-            'curiosity': 'energetic',
-            'boredom': 'lazy',
-            'tiredness': 'tired',
-            'fatigue': 'tired',
-            'exhaustion': 'tired',
-            'neutral': 'neutral',
-            'calmness': 'neutral',
-            'peace': 'happy'
-        }
+        # Offline city index used to validate locations without a network call
+        self.gazetteer = get_gazetteer()
         
-        # Weather-based food adjustments
-        self.weather_food_adjustments = {
-            'hot': ['cold', 'refreshing', 'light', 'cooling'],
-            'cold': ['warm', 'hearty', 'hot', 'comforting'],
-            'rainy': ['warm', 'comforting', 'indoor'],
-            'sunny': ['fresh', 'light', 'outdoor-friendly']
-        }
+        # Blocking model and HTTP work runs here so deadlines can abandon it; unlike the
+        # loop's default executor, a per-request event loop never waits on it at shutdown.
+        # Abandoned calls still hold a thread, so submissions past RECOMMENDER_MAX_PENDING
+        # are rejected and the stage degrades rather than queueing behind them.
+        self.executor = BoundedExecutor(
+            max_workers=int(os.getenv('RECOMMENDER_THREADS', 8)),
+            max_pending=int(os.getenv('RECOMMENDER_MAX_PENDING', 0)) or None,
+            thread_name_prefix='recommender'
+        )
         
-        # Enhanced mood keyword mapping with context and intensity
-        self.mood_keywords = {
-            'lazy': {
-                'keywords': ['lazy', 'tired', 'exhausted', 'fatigued', 'sleepy', 'drowsy', 'unmotivated', 'sluggish'],
-                'intensifiers': ['very', 'extremely', 'really', 'so'],
-                'context': ['couch', 'bed', 'relax', 'rest', 'nap']
-            },
-            'romantic': {
-                'keywords': ['romantic', 'love', 'passionate', 'intimate', 'amorous', 'romance', 'date'],
-                'intensifiers': ['very', 'deeply', 'truly', 'madly'],
-                'context': ['partner', 'date', 'candlelight', 'dinner', 'special']
-            },
-            'happy': {
-                'keywords': ['happy', 'joyful', 'cheerful', 'glad', 'delighted', 'excited', 'thrilled', 'elated'],
-                'intensifiers': ['very', 'extremely', 'really', 'so'],
-                'context': ['great', 'wonderful', 'amazing', 'fantastic']
-            },
-            'sad': {
-                'keywords': ['sad', 'unhappy', 'depressed', 'down', 'gloomy', 'miserable', 'heartbroken'],
-                'intensifiers': ['very', 'extremely', 'really', 'so'],
-                'context': ['cry', 'miss', 'lonely', 'alone']
-            },
-            'energetic': {
-                'keywords': ['energetic', 'energized', 'active', 'vibrant', 'lively', 'dynamic', 'peppy'],
-                'intensifiers': ['very', 'extremely', 'really', 'so'],
-                'context': ['workout', 'exercise', 'run', 'play']
-            },
-            'stressed': {
-                'keywords': ['stressed', 'anxious', 'worried', 'tense', 'nervous', 'overwhelmed', 'pressured'],
-                'intensifiers': ['very', 'extremely', 'really', 'so'],
-                'context': ['deadline', 'work', 'pressure', 'anxiety']
-            },
-            'productive': {
-                'keywords': ['productive', 'focused', 'motivated', 'determined', 'efficient', 'accomplished'],
-                'intensifiers': ['very', 'extremely', 'really', 'so'],
-                'context': ['work', 'task', 'project', 'goal']
-            },
-            'neutral': {
-                'keywords': ['neutral', 'okay', 'fine', 'alright', 'normal', 'average', 'regular'],
-                'intensifiers': [],
-                'context': ['usual', 'typical', 'standard']
-            }
-        }
+        # Stops calling Weatherbit while it is failing, so outages cost no latency
+        self.weather_breaker = CircuitBreaker(
+            'weatherbit',
+            failure_threshold=float(os.getenv('WEATHER_BREAKER_THRESHOLD', 0.5)),
+            window_size=int(os.getenv('WEATHER_BREAKER_WINDOW', 20)),
+            cooldown=float(os.getenv('WEATHER_BREAKER_COOLDOWN', 30))
+        )
         
-        # Compound emotion patterns
-        self.compound_patterns = {
-            'romantic': [
-                ('love', 'happy'),
-                ('desire', 'excitement'),
-                ('admiration', 'joy')
-            ],
-            'stressed': [
-                ('anxiety', 'fear'),
-                ('anger', 'frustration'),
-                ('worry', 'nervousness')
-            ],
-            'productive': [
-                ('pride', 'determination'),
-                ('focus', 'motivation'),
-                ('accomplishment', 'satisfaction')
-            ]
-        }
+        # Set by servers with a long-lived event loop to coalesce concurrent model calls
+        self.emotion_batcher = None
         
-        # Enhanced seasonal food preferences
-        self.seasonal_preferences = {
-            'spring': {
-                'temperature_range': (45, 70),
-                'preferred_styles': ['light', 'fresh', 'crisp', 'grilled'],
-                'ingredients': ['asparagus', 'strawberries', 'peas', 'radishes', 'spring greens'],
-                'avoid': ['heavy', 'rich', 'warm']
-            },
-            'summer': {
-                'temperature_range': (70, 95),
-                'preferred_styles': ['cold', 'refreshing', 'light', 'grilled'],
-                'ingredients': ['tomatoes', 'cucumber', 'watermelon', 'berries', 'fresh herbs'],
-                'avoid': ['hot', 'heavy', 'baked']
-            },
-            'fall': {
-                'temperature_range': (45, 70),
-                'preferred_styles': ['warm', 'roasted', 'comforting'],
-                'ingredients': ['pumpkin', 'apples', 'squash', 'cranberries', 'nuts'],
-                'avoid': ['cold', 'light', 'raw']
-            },
-            'winter': {
-                'temperature_range': (20, 45),
-                'preferred_styles': ['warm', 'hearty', 'comforting', 'hot'],
-                'ingredients': ['root vegetables', 'winter squash', 'citrus', 'dark greens'],
-                'avoid': ['cold', 'raw', 'light']
-            }
-        }
+        # Normalized weather per location bucket, refreshed by the prefetch scheduler;
+        # bounded by idle time and entry count even when nothing prefetches
+        self.weather_cache = WeatherCache(
+            ttl=float(os.getenv('WEATHER_CACHE_TTL', 600)),
+            refresh_margin=float(os.getenv('WEATHER_REFRESH_MARGIN', 120)),
+            max_idle=float(os.getenv('WEATHER_PREFETCH_IDLE', 1800)),
+            max_entries=int(os.getenv('WEATHER_CACHE_MAX_ENTRIES', 5000))
+        )
         
-        # Temperature-based adjustments
-        self.temperature_adjustments = {
-            'very_cold': {
-                'range': (-float('inf'), 32),
-                'multipliers': {
-                    'warm': 1.5,
-                    'hot': 1.3,
-                    'cold': 0.5,
-                    'raw': 0.3
-                }
-            },
-            'cold': {
-                'range': (32, 45),
-                'multipliers': {
-                    'warm': 1.3,
-                    'hot': 1.2,
-                    'cold': 0.7,
-                    'raw': 0.5
-                }
-            },
-            'mild': {
-                'range': (45, 70),
-                'multipliers': {
-                    'warm': 1.1,
-                    'hot': 1.0,
-                    'cold': 1.0,
-                    'raw': 1.0
-                }
-            },
-            'warm': {
-                'range': (70, 85),
-                'multipliers': {
-                    'warm': 0.8,
-                    'hot': 0.7,
-                    'cold': 1.2,
-                    'raw': 1.3
-                }
-            },
-            'hot': {
-                'range': (85, float('inf')),
-                'multipliers': {
-                    'warm': 0.6,
-                    'hot': 0.5,
-                    'cold': 1.5,
-                    'raw': 1.5
-                }
+        # Keep-alive connections to Weatherbit, shared by request and prefetch threads
+        self.http = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=self.executor._max_workers)
+        self.http.mount('https://', adapter)
+        self.http.mount('http://', adapter)
+        
+        # Decayed running mood per chat session, so a message is analyzed on its own
+        # and combined with the conversation so far
+        self.sessions = SessionMoodTracker(
+            half_life=float(os.getenv('SESSION_MOOD_HALF_LIFE', 300)),
+            ttl=float(os.getenv('SESSION_TTL', 1800)),
+            max_sessions=int(os.getenv('MAX_SESSIONS', 10000))
+        )
+        
+        # Set once warm_up() has finished; /api/health reports not ready until then
+        self.ready = False
+        self.warmup_report: Dict = {}
+        
+        # Hot model reload: in-flight calls per analyzer, so a swapped-out one can be drained.
+        # model_version changes on every swap; anything caching model output keys on it.
+        self.model_version = 1
+        self.reload_status: Dict = {'state': 'idle'}
+        self._analyzer_users: Dict[int, int] = {}
+        self._analyzer_changed = threading.Condition()
+        self._reload_lock = threading.Lock()
+
+    def warm_up(self, rounds: int = 2) -> Dict:
+        """Run representative inputs through the model and pre-open the Weatherbit connection."""
+        started = time.perf_counter()
+        report = {}
+        try:
+            report.update(self.warm_up_analyzer(self.sentiment_analyzer, rounds))
+            
+            if self.weatherbit_api_key and self.user_data.get('weather_enabled', True):
+                location = self.user_data['location']
+                try:
+                    weather = self.fetch_weather(location, timeout=5)
+                    self.weather_cache.put(self.weather_key(location), location, weather)
+                    report['weather'] = 'ok'
+                except Exception as e:
+                    report['weather'] = f'failed: {e}'
+        finally:
+            report['seconds'] = round(time.perf_counter() - started, 3)
+            self.warmup_report = report
+            # A model that failed warm-up would fail real requests too; stay unready
+            # (a successful reload_model makes the process ready)
+            self.ready = report.get('model') == 'ok'
+        if self.ready:
+            logger.info("Warm-up finished in %ss", report['seconds'], extra={'warmup': report})
+        else:
+            logger.error("Warm-up failed after %ss; not ready", report['seconds'], extra={'warmup': report})
+        return report
+
+    def warm_up_analyzer(self, analyzer, rounds: int = 2) -> Dict:
+        """Run typical input lengths through an analyzer so real requests don't pay first-call costs."""
+        texts = [' '.join((WARMUP_SENTENCE.split() * 32)[:words]) for words in WARMUP_LENGTHS]
+        started = time.perf_counter()
+        report = {}
+        try:
+            for _ in range(rounds):
+                for text in texts:
+                    analyzer(text, truncation=True)
+                analyzer(texts, truncation=True, batch_size=len(texts))
+            report['model'] = 'ok'
+        except Exception as e:
+            report['model'] = f'failed: {e}'
+        report['model_seconds'] = round(time.perf_counter() - started, 3)
+        return report
+
+    def load_analyzer(self, model_dir: str = None):
+        """A fresh analyzer for the configured mode, from model_dir when given."""
+        if self.analyzer_mode == 'keyword':
+            return self.load_lexicon_scorer()
+        return load_emotion_pipeline(model_dir, self.emotion_top_k)
+
+    @contextmanager
+    def analyzer_in_use(self):
+        """The current analyzer, counted as in use until the block exits so a reload can drain it."""
+        with self._analyzer_changed:
+            analyzer = self.sentiment_analyzer
+            self._analyzer_users[id(analyzer)] = self._analyzer_users.get(id(analyzer), 0) + 1
+        try:
+            yield analyzer
+        finally:
+            with self._analyzer_changed:
+                remaining = self._analyzer_users[id(analyzer)] - 1
+                if remaining:
+                    self._analyzer_users[id(analyzer)] = remaining
+                else:
+                    del self._analyzer_users[id(analyzer)]
+                    self._analyzer_changed.notify_all()
+
+    def start_model_reload(self, model_dir: str = None, drain_timeout: float = 30) -> bool:
+        """Reload the analyzer on a background thread; False if a reload is already running."""
+        with self._reload_lock:
+            if self.reload_status['state'] == 'running':
+                return False
+            self.reload_status = {
+                'state': 'running',
+                'model_source': model_dir or self.model_dir or EMOTION_MODEL,
+                'started_at': datetime.datetime.now().isoformat(timespec='seconds')
             }
+        threading.Thread(
+            target=self._run_model_reload,
+            args=(model_dir, drain_timeout),
+            name='model-reload',
+            daemon=True
+        ).start()
+        return True
+
+    def _run_model_reload(self, model_dir: str, drain_timeout: float):
+        try:
+            report = self.reload_model(model_dir, drain_timeout)
+            status = dict(self.reload_status, state='done', **report)
+            MODEL_RELOADS.inc(result='success')
+        except Exception as e:
+            logger.exception("Model reload failed: %s", e)
+            status = dict(self.reload_status, state='failed', error=str(e))
+            MODEL_RELOADS.inc(result='failure')
+        status['finished_at'] = datetime.datetime.now().isoformat(timespec='seconds')
+        with self._reload_lock:
+            self.reload_status = status
+
+    def reload_model(self, model_dir: str = None, drain_timeout: float = 30) -> Dict:
+        """Load and warm up a new analyzer, swap it in, then drain and free the old one.
+        
+        The old analyzer keeps serving until the swap, so capacity does not drop
+        while the new one loads; the process briefly holds both.
+        """
+        started = time.perf_counter()
+        model_dir = model_dir or self.model_dir
+        analyzer = self.load_analyzer(model_dir)
+        warm_up = self.warm_up_analyzer(analyzer)
+        if warm_up['model'] != 'ok':
+            raise RuntimeError(f"new model failed warm-up: {warm_up['model']}")
+        loaded = time.perf_counter()
+        
+        with self._analyzer_changed:
+            old_analyzer = self.sentiment_analyzer
+            self.sentiment_analyzer = analyzer
+            self.model_dir = model_dir
+            self.model_version += 1
+            # The new analyzer passed warm-up, even if the startup one did not
+            self.ready = True
+            # Calls that picked up the old analyzer before the swap finish on it
+            drained = self._analyzer_changed.wait_for(
+                lambda: id(old_analyzer) not in self._analyzer_users, timeout=drain_timeout
+            )
+        del old_analyzer
+        gc.collect()
+        
+        logger.info("Emotion model reloaded (version %s)", self.model_version)
+        return {
+            'model_version': self.model_version,
+            'load_seconds': round(loaded - started, 3),
+            'drain_seconds': round(time.perf_counter() - loaded, 3),
+            'drained': drained,
+            'rss_bytes': process_rss_bytes()
         }
 
+    def load_lexicon_scorer(self) -> LexiconScorer:
+        """Lexicon scorer for keyword-only mode; MOOD_LEXICON names a JSON lexicon or 'none'."""
+        lexicon = os.getenv('MOOD_LEXICON', '')
+        if lexicon == 'none':
+            # Anything without a keyword match is treated as neutral
+            return LexiconScorer({}, self.emotion_top_k)
+        if lexicon:
+            return LexiconScorer.from_file(lexicon, self.emotion_top_k)
+        return LexiconScorer(top_k=self.emotion_top_k)
+
     def load_user_data(self) -> Dict:
         """Load user data from file or create new if doesn't exist."""
         if self.data_file.exists():
@@ -339,9 +356,20 @@ class MoodFoodRecommender:
         }
 
     def save_user_data(self):
-        """Save user data to file."""
-        with open(self.data_file, 'w') as f:
-            json.dump(self.user_data, f, indent=4)
+        """Save a consistent snapshot of user data, atomically and never older than what's on disk."""
+        with STAGE_LATENCY.time(stage='persistence'):
+            with self._user_lock:
+                self._user_data_version += 1
+                version = self._user_data_version
+            with self._save_lock:
+                # Saves queued behind one that already wrote their change have nothing to do
+                if version <= self._saved_version:
+                    return
+                with self._user_lock:
+                    version = self._user_data_version
+                    snapshot = json.dumps(self.user_data, indent=4)
+                atomic_write_text(self.data_file, snapshot)
+                self._saved_version = version
 
     def get_default_weather(self) -> Dict:
         """Get default weather data based on current season and time of day."""
@@ -390,111 +418,95 @@ class MoodFoodRecommender:
             'wind_speed': 5  # Default wind speed
         }
 
-    async def get_weather(self, location: str) -> Dict:
+    async def get_weather(self, location: str, timeout: float = 10) -> Dict:
         """Get current weather conditions for the location using Weatherbit API."""
         if not self.user_data.get('weather_enabled', True) or not self.weatherbit_api_key:
             return self.get_default_weather()
+        
+        key = self.weather_key(location)
+        cached = self.weather_cache.get(key, location)
+        if cached is not None:
+            return cached
             
         try:
-            # Get current weather data
-            params = {
-                'city': location,
-                'key': self.weatherbit_api_key,
-                'units': 'I',  # Imperial units (Fahrenheit)
-                'include': 'minutely'  # Include detailed weather data
-            }
-            
-            response = requests.get(f"{self.weatherbit_base_url}/current", params=params)
-            response.raise_for_status()
-            weather_data = response.json()
-            
-            if not weather_data.get('data'):
-                raise Exception("No weather data found for location")
-                
-            current = weather_data['data'][0]
-            
-            # Extract relevant weather information
-            temp = current['temp']
-            precip = current.get('precip', 0)
-            clouds = current.get('clouds', 0)
-            humidity = current.get('rh', 60)  # Relative humidity
-            wind_speed = current.get('wind_spd', 5)  # Wind speed in mph
-            weather_code = current['weather']['code']
-            
-            # Enhanced weather condition detection
-            weather_conditions = {
-                'clear': [800],
-                'partly_cloudy': [801, 802],
-                'cloudy': [803, 804],
-                'light_rain': [500, 501, 502, 503],
-                'heavy_rain': [504, 505, 506, 507],
-                'thunderstorm': [200, 201, 202, 230, 231, 232, 233],
-                'snow': [600, 601, 602, 610, 611, 612, 621, 622, 623],
-                'sleet': [700, 711, 721, 731, 741, 751],
-                'fog': [701, 711, 721, 731, 741, 751]
-            }
-            
-            # Determine weather condition
-            condition = 'unknown'
-            for cond, codes in weather_conditions.items():
-                if weather_code in codes:
-                    condition = cond
-                    break
-            
-            # Enhanced temperature categorization
-            temp_category = self.get_temperature_category(temp)
-            
-            # Determine weather states with more nuanced thresholds
-            is_hot = temp > 80 or (temp > 75 and humidity > 70)  # Consider humidity for hot conditions
-            is_cold = temp < 40 or (temp < 45 and wind_speed > 15)  # Consider wind chill
-            is_rainy = (
-                precip > 0 or 
-                clouds > 70 or 
-                weather_code in [500, 501, 502, 503, 504, 505, 506, 507, 200, 201, 202, 230, 231, 232, 233]
-            )
-            is_sunny = (
-                clouds < 30 and 
-                precip == 0 and 
-                weather_code in [800, 801] and
-                humidity < 80  # Consider humidity for sunny conditions
-            )
-            
-            # Adjust temperature based on wind chill or heat index
-            feels_like = temp
-            if is_cold and wind_speed > 5:
-                # Simple wind chill calculation
-                feels_like = temp - (wind_speed * 0.1)
-            elif is_hot and humidity > 60:
-                # Simple heat index calculation
-                feels_like = temp + (humidity * 0.1)
-            
-            return {
-                'temperature': temp,
-                'feels_like': feels_like,
-                'condition': condition,
-                'is_hot': is_hot,
-                'is_cold': is_cold,
-                'is_rainy': is_rainy,
-                'is_sunny': is_sunny,
-                'humidity': humidity,
-                'wind_speed': wind_speed,
-                'clouds': clouds,
-                'precip': precip
-            }
-            
+            # Run the blocking HTTP call off the event loop so callers can time it out
+            weather = await self.run_blocking(self.fetch_weather, location, timeout)
+            self.weather_cache.put(key, location, weather)
+            return weather
+        except (CircuitOpenError, ExecutorSaturatedError):
+            return self.get_default_weather()
         except requests.exceptions.RequestException as e:
-            print(f"Weather API error: {e}")
-            print("Using default weather based on current season...")
+            logger.warning("Weather API error, using default weather: %s", e, extra={'location': location})
             return self.get_default_weather()
         except Exception as e:
-            print(f"Unexpected error: {e}")
-            print("Using default weather based on current season...")
+            logger.warning("Unexpected weather error, using default weather: %s", e, extra={'location': location})
             return self.get_default_weather()
 
+    def fetch_weather(self, location: str, timeout: float = 10) -> Dict:
+        """Fetch and normalize current weather from Weatherbit, raising on failure."""
+        return normalize_weather(self.fetch_observation(location, timeout), self.rules)
+
+    def fetch_observation(self, location: str, timeout: float = 10) -> Dict:
+        """Fetch the raw Weatherbit observation for a location, raising on failure."""
+        # Get current weather data
+        params = {
+            'key': self.weatherbit_api_key,
+            'units': 'I',  # Imperial units (Fahrenheit)
+            'include': 'minutely'  # Include detailed weather data
+        }
+        params.update(self.location_params(location))
+        
+        if not self.weather_breaker.allow_request():
+            raise CircuitOpenError("Weatherbit circuit is open")
+        try:
+            response = self.http.get(f"{self.weatherbit_base_url}/current", params=params, timeout=timeout)
+            response.raise_for_status()
+            weather_data = response.json()
+        except requests.exceptions.RequestException:
+            self.weather_breaker.record_failure()
+            raise
+        self.weather_breaker.record_success()
+        
+        if not weather_data.get('data'):
+            raise Exception("No weather data found for location")
+            
+        return weather_data['data'][0]
+
+    def normalize_observations(self, observations: List[Dict]) -> List[Dict]:
+        """Normalize a batch of raw observations, e.g. from one prefetch tick."""
+        return normalize_weather_batch(observations, self.rules)
+
+    def weather_key(self, location: str) -> str:
+        """Cache key for a location: its coordinate bucket if known, else the normalized name."""
+        city = self.gazetteer.lookup(location)
+        if city:
+            lat, lon = city.bucket()
+            return f"{lat:.1f},{lon:.1f}"
+        return normalize_name(location)
+
+    def location_params(self, location: str) -> Dict:
+        """Weatherbit query parameters for a location, using bucketed coordinates when known."""
+        city = self.gazetteer.lookup(location)
+        if city:
+            lat, lon = city.bucket()
+            return {'lat': lat, 'lon': lon}
+        return {'city': location}
+
     def set_location(self, location: str):
-        """Set the user's location and validate it with Weatherbit API."""
+        """Set the user's location, validating it against the bundled gazetteer first."""
+        city = self.gazetteer.lookup(location)
+        if city:
+            with self._user_lock:
+                self.user_data['location'] = city.name
+            self.save_user_data()
+            logger.info("Location updated to: %s", city.display_name)
+            return
+        
+        # Unknown to the gazetteer (a close spelling may still be a real city it lacks);
+        # fall back to validating with Weatherbit
         if not self.weatherbit_api_key:
-            print("Error: Weatherbit API key not configured. Please set WEATHERBIT_API_KEY in your .env file.")
+            logger.error("Weatherbit API key not configured; cannot validate location %r%s", location,
+                         self._location_hint(location))
             return
             
         try:
@@ -505,66 +517,108 @@ class MoodFoodRecommender:
                 'units': 'I'  # Imperial units (Fahrenheit)
             }
             
-            response = requests.get(f"{self.weatherbit_base_url}/current", params=params)
+            response = self.http.get(f"{self.weatherbit_base_url}/current", params=params)
             response.raise_for_status()
             weather_data = response.json()
             
             if not weather_data.get('data'):
                 raise Exception("Location not found")
                 
-            self.user_data['location'] = location
+            with self._user_lock:
+                self.user_data['location'] = location
             self.save_user_data()
-            print(f"Location updated to: {location}")
+            logger.info("Location updated to: %s", location)
         except requests.exceptions.RequestException as e:
-            print(f"Error connecting to weather service: {e}")
-            print("Please check your internet connection and API key.")
+            logger.warning("Error connecting to weather service to validate %r: %s", location, e)
         except Exception as e:
-            print(f"Error validating location: {e}")
-            print("Please enter a valid city name.")
+            logger.warning("Error validating location %r: %s%s", location, e, self._location_hint(location))
 
-    def toggle_weather(self):
-        """Toggle weather-based recommendations on/off."""
-        self.user_data['weather_enabled'] = not self.user_data.get('weather_enabled', True)
+    def _location_hint(self, location: str) -> str:
+        suggestion = self.gazetteer.suggest(location)
+        return f" (did you mean {suggestion.display_name}?)" if suggestion else ""
+
+    def toggle_weather(self) -> bool:
+        """Toggle weather-based recommendations on/off, returning the new setting."""
+        with self._user_lock:
+            enabled = not self.user_data.get('weather_enabled', True)
+            self.user_data['weather_enabled'] = enabled
         self.save_user_data()
-        status = "enabled" if self.user_data['weather_enabled'] else "disabled"
-        print(f"Weather-based recommendations {status}")
+        logger.info("Weather-based recommendations %s", "enabled" if enabled else "disabled")
+        return enabled
 
     def analyze_mood(self, text: str) -> Dict:
         """Analyze the mood from text input using enhanced emotion detection."""
+        keyword_match = self.match_mood_keywords(text)
+        if keyword_match and keyword_match['intensity'] > 0.5:
+            MOOD_PATH.inc(path='keyword')
+            return keyword_match
+        
+        # If no direct keyword match or low confidence, use emotion detection model
+        emotion_scores = self.classify_emotions(text)
+        return self.interpret_emotions(text, emotion_scores)
+
+    def has_negation(self, text: str) -> bool:
+        """Check whether the text contains a negation word."""
+        return not self.negation_words.isdisjoint(text.lower().split())
+
+    def is_keyword_path(self, text: str) -> bool:
+        """Whether keyword matching alone settles the mood, so no model call is needed."""
+        keyword_match = self.match_mood_keywords(text)
+        return bool(keyword_match and keyword_match['intensity'] > 0.5)
+
+    def classify_emotions(self, text: str) -> List:
+        """Run the emotion model, truncating inputs longer than the model accepts."""
+        BATCH_SIZE.observe(1, source='single')
+        with self.analyzer_in_use() as analyzer:
+            return analyzer(text, truncation=True)
+
+    def classify_emotions_batch(self, texts: List[str]) -> List:
+        """Run the emotion model over many texts in one call; one score list per text."""
+        BATCH_SIZE.observe(len(texts), source='batch')
+        with self.analyzer_in_use() as analyzer:
+            return analyzer(texts, truncation=True, batch_size=max(1, min(len(texts), self.model_batch_size)))
+
+    def match_mood_keywords(self, text: str) -> Optional[Dict]:
+        """Best direct keyword match with context and intensity, or None."""
         text_lower = text.lower()
         words = text_lower.split()
         
         # Check for negation
-        has_negation = any(word in self.negation_words for word in words)
+        has_negation = not self.rules.negation_words.isdisjoint(words)
         
         # Check for direct mood keywords with context and intensity
         best_match = None
         best_intensity = 0
+        cue_counts = None
         
-        for mood, data in self.mood_keywords.items():
+        for mood, lexicon in self.mood_keywords.items():
             # Check for keywords
-            keyword_found = any(keyword in text_lower for keyword in data['keywords'])
+            keyword_found = any(keyword in text_lower for keyword in lexicon.keywords)
             
             if keyword_found:
+                # Intensifier and context words for every mood, counted in one pass
+                if cue_counts is None:
+                    cue_counts = self.rules.cue_counts(words)
+                
                 # Calculate intensity based on intensifiers and context
                 intensity = 0.7  # Base intensity for keyword match
                 
                 # Check for intensifiers
-                for word in words:
-                    if word in data['intensifiers']:
-                        intensity = min(1.0, intensity + 0.2)
+                for _ in range(cue_counts.get((mood, 'intensifiers'), 0)):
+                    intensity = min(1.0, intensity + 0.2)
                 
                 # Check for context words
-                context_matches = sum(1 for word in words if word in data['context'])
+                context_matches = cue_counts.get((mood, 'context'), 0)
                 if context_matches > 0:
                     intensity = min(1.0, intensity + (0.1 * context_matches))
                 
                 # Check for emotional context phrases
-                if mood in self.emotional_context:
-                    for phrase in self.emotional_context[mood]['positive_context']:
+                phrases = self.emotional_context.get(mood)
+                if phrases:
+                    for phrase in phrases.positive:
                         if phrase in text_lower:
                             intensity = min(1.0, intensity + 0.15)
-                    for phrase in self.emotional_context[mood]['negative_context']:
+                    for phrase in phrases.negative:
                         if phrase in text_lower:
                             intensity = max(0.0, intensity - 0.15)
                 
@@ -572,17 +626,7 @@ class MoodFoodRecommender:
                 if has_negation:
                     intensity = 1.0 - intensity
                     # Map to opposite mood if possible
-                    opposite_moods = {
-                        'happy': 'sad',
-                        'sad': 'happy',
-                        'energetic': 'tired',
-                        'tired': 'energetic',
-                        'stressed': 'calm',
-                        'productive': 'lazy',
-                        'lazy': 'productive'
-                    }
-                    if mood in opposite_moods:
-                        mood = opposite_moods[mood]
+                    mood = self.rules.opposite_moods.get(mood, mood)
                 
                 if intensity > best_intensity:
                     best_intensity = intensity
@@ -594,11 +638,13 @@ class MoodFoodRecommender:
                         "secondary_emotions": []
                     }
         
-        if best_match and best_intensity > 0.5:
-            return best_match
-        
-        # If no direct keyword match or low confidence, use emotion detection model
-        emotion_scores = self.sentiment_analyzer(text)
+        return best_match
+
+    def interpret_emotions(self, text: str, emotion_scores: List) -> Dict:
+        """Map emotion model output for the text to a mood analysis."""
+        if self.projection:
+            return self.interpret_emotions_batch([text], emotion_scores)[0]
+        has_negation = self.has_negation(text)
         
         # Get top emotions and their scores
         top_emotions = []
@@ -614,9 +660,11 @@ class MoodFoodRecommender:
         top_emotions.sort(key=lambda x: x[1], reverse=True)
         
         # Check for compound emotions
+        top_labels = {e[0] for e in top_emotions}
         for mood, patterns in self.compound_patterns.items():
             for pattern in patterns:
-                if all(any(e[0] == p for e in top_emotions) for p in pattern):
+                if pattern <= top_labels:
+                    MOOD_PATH.inc(path='compound')
                     return {
                         "emotion_scores": emotion_scores[0],
                         "mood": mood,
@@ -642,6 +690,7 @@ class MoodFoodRecommender:
                         top_emotion = emotion
                         break
         
+        MOOD_PATH.inc(path='model')
         return {
             "emotion_scores": emotion_scores[0],
             "mood": mood,
@@ -650,6 +699,14 @@ class MoodFoodRecommender:
             "secondary_emotions": [e[0] for e in top_emotions[1:]]
         }
 
+    def interpret_emotions_batch(self, texts: List[str], batch_scores: List) -> List[Dict]:
+        """interpret_emotions for many texts; distribution scoring does them in one matrix product."""
+        if not self.projection:
+            return [self.interpret_emotions(text, [scores]) for text, scores in zip(texts, batch_scores)]
+        MOOD_PATH.inc(len(texts), path='distribution')
+        analyses = self.projection.interpret(batch_scores, [self.has_negation(text) for text in texts])
+        return [analysis or self.neutral_mood_analysis() for analysis in analyses]
+
     def get_season(self, month: int) -> str:
         """Determine the current season based on month."""
         if 3 <= month <= 5:
@@ -663,26 +720,14 @@ class MoodFoodRecommender:
 
     def get_temperature_category(self, temperature: float) -> str:
         """Get temperature category based on current temperature with more granular ranges."""
-        if temperature < 32:
-            return 'very_cold'
-        elif 32 <= temperature < 45:
-            return 'cold'
-        elif 45 <= temperature < 60:
-            return 'cool'
-        elif 60 <= temperature < 75:
-            return 'mild'
-        elif 75 <= temperature < 85:
-            return 'warm'
-        else:
-            return 'hot'
+        return self.rules.temperature_category(temperature)
 
     def calculate_food_score(self, food: str, temperature: float, season: str) -> float:
         """Calculate a score for a food item based on temperature and season."""
         score = 1.0  # Base score
         
-        # Get temperature category and adjustments
-        temp_category = self.get_temperature_category(temperature)
-        temp_multipliers = self.temperature_adjustments[temp_category]['multipliers']
+        # Get temperature adjustments for the temperature's band
+        temp_multipliers = self.rules.temperature_band(temperature).multipliers
         
         # Get seasonal preferences
         season_prefs = self.seasonal_preferences[season]
@@ -699,50 +744,62 @@ class MoodFoodRecommender:
             score *= temp_multipliers['raw']
         
         # Apply seasonal preferences
-        for style in season_prefs['preferred_styles']:
+        for style in season_prefs.preferred_styles:
             if style in food_lower:
                 score *= 1.2
-        for ingredient in season_prefs['ingredients']:
+        for ingredient in season_prefs.ingredients:
             if ingredient in food_lower:
                 score *= 1.1
-        for avoid in season_prefs['avoid']:
+        for avoid in season_prefs.avoid:
             if avoid in food_lower:
                 score *= 0.8
         
         return score
 
+    def rank_foods(self, mood: str, foods: List[str], temperature: float, season: str) -> Tuple[str, ...]:
+        """Top 3 foods for a mood by temperature and season score, preferred foods boosted."""
+        preferred_foods = [pf.lower() for pf in self.user_data['preferences'].get(mood, ())]
+        
+        # Calculate scores for each recommendation
+        scored_recommendations = []
+        for food in foods:
+            score = self.calculate_food_score(food, temperature, season)
+            # Consider user preferences
+            if any(pf in food.lower() for pf in preferred_foods):
+                score *= 1.2  # Boost score for preferred foods
+            scored_recommendations.append((food, score))
+        
+        # Sort by score
+        scored_recommendations.sort(key=lambda x: x[1], reverse=True)
+        
+        # Get top 3 recommendations
+        return tuple(food for food, _ in scored_recommendations[:3])
+
     def get_food_recommendations(self, mood: str, weather: Dict = None) -> List[str]:
         """Get food recommendations based on mood, weather, and season."""
         # Get base recommendations from mapping
-        recommendations = self.food_mood_mapping.get(mood, [])
+        recommendations = list(self.food_mood_mapping.get(mood, ()))
         
         if weather and self.user_data.get('weather_enabled', True):
             # Get current season
             current_month = datetime.datetime.now().month
             season = self.get_season(current_month)
             
-            # Calculate scores for each recommendation
-            scored_recommendations = []
-            for food in recommendations:
-                score = self.calculate_food_score(food, weather['temperature'], season)
-                scored_recommendations.append((food, score))
-            
-            # Sort by score
-            scored_recommendations.sort(key=lambda x: x[1], reverse=True)
-            
-            # Consider user preferences
-            if mood in self.user_data['preferences']:
-                preferred_foods = self.user_data['preferences'][mood]
-                for food, score in scored_recommendations:
-                    if any(pf in food.lower() for pf in preferred_foods):
-                        score *= 1.2  # Boost score for preferred foods
-            
-            # Get top 3 recommendations
-            recommendations = [food for food, _ in scored_recommendations[:3]]
+            # Read the version before the preferences, so an entry is never newer than its key
+            key = (mood, self.rules.temperature_category(weather['temperature']), season,
+                   self._preferences_version)
+            ranked = self._ranked_foods.get(key)
+            if ranked is None:
+                RECOMMENDATION_CACHE_LOOKUPS.inc(result='miss')
+                ranked = self.rank_foods(mood, recommendations, weather['temperature'], season)
+                self._ranked_foods[key] = ranked
+            else:
+                RECOMMENDATION_CACHE_LOOKUPS.inc(result='hit')
+            recommendations = list(ranked)
         
         # Ensure we have at least 3 recommendations
         if len(recommendations) < 3:
-            all_mood_foods = self.food_mood_mapping.get(mood, [])
+            all_mood_foods = self.food_mood_mapping.get(mood, ())
             additional = [r for r in all_mood_foods if r not in recommendations]
             recommendations.extend(additional)
         
@@ -754,39 +811,218 @@ class MoodFoodRecommender:
 
     def update_user_preferences(self, mood: str, food: str):
         """Update user preferences based on their mood and food choice."""
-        if mood not in self.user_data['preferences']:
-            self.user_data['preferences'][mood] = []
-        
-        # Add food to preferences if not already present
-        if food not in self.user_data['preferences'][mood]:
-            self.user_data['preferences'][mood].append(food)
-        
-        # Update history
-        self.user_data['history'].append({
-            'date': datetime.datetime.now().isoformat(),
-            'mood': mood,
-            'food': food
-        })
+        with self._user_lock:
+            # Add food to preferences if not already present, copying the list so
+            # concurrent readers keep iterating the old one
+            foods = self.user_data['preferences'].get(mood, [])
+            if food not in foods:
+                self.user_data['preferences'][mood] = foods + [food]
+                # Rankings computed under the old preferences no longer apply
+                self._preferences_version += 1
+                self._ranked_foods.clear()
+            
+            # Update history
+            self.user_data['history'].append({
+                'date': datetime.datetime.now().isoformat(),
+                'mood': mood,
+                'food': food
+            })
         
         # Save updated data
         self.save_user_data()
 
-    async def get_recommendation(self, text: str) -> Tuple[str, List[str], Dict]:
-        """Get mood analysis and food recommendations for input text."""
-        # Analyze mood
-        mood_analysis = self.analyze_mood(text)
-        mood = mood_analysis['mood']
+    async def recommend(self, text: str, deadline: Deadline = None, session_id: str = None) -> Dict:
+        """Run the recommendation stages under a request deadline, degrading stages that overrun."""
+        stream = self.recommend_stream(text, deadline, session_id)
+        try:
+            async for event, data in stream:
+                if event == 'done':
+                    return data
+        finally:
+            await stream.aclose()
+
+    async def recommend_stream(self, text: str, deadline: Deadline = None, session_id: str = None):
+        """Yield (event, data) pairs as each recommendation stage completes.
+
+        Events are 'mood' (first provisional from keywords, then final),
+        'weather', 'recommendations' and finally 'done' with the full result.
+        With a session_id the final mood is the session's running mood, which
+        this message's analysis is folded into.
+        """
+        deadline = deadline or Deadline()
+        
+        # Weather doesn't depend on the mood, so fetch it while the mood is analyzed
+        weather_task = asyncio.ensure_future(self._weather_stage(deadline))
+        try:
+            # Keyword matching is cheap and always runs
+            started = time.monotonic()
+            keyword_match = self.match_mood_keywords(text)
+            deadline.record('keywords', started)
+        
+            if keyword_match and keyword_match['intensity'] > 0.5:
+                MOOD_PATH.inc(path='keyword')
+                mood_analysis = keyword_match
+            else:
+                yield 'mood', self._mood_event(keyword_match or self.neutral_mood_analysis(), provisional=True)
+                started = time.monotonic()
+                try:
+                    if self.emotion_batcher:
+                        inference = self.emotion_batcher.classify(text)
+                    else:
+                        inference = self.run_blocking(self.classify_emotions, text)
+                    emotion_scores = await asyncio.wait_for(inference, deadline.budget('model'))
+                    mood_analysis = self.interpret_emotions(text, emotion_scores)
+                except (asyncio.TimeoutError, ExecutorSaturatedError):
+                    # Fall back to whatever the keywords suggested
+                    deadline.degrade('model')
+                    mood_analysis = keyword_match or self.neutral_mood_analysis()
+                deadline.record('model', started)
+            session = self.sessions.update(session_id, mood_analysis) if session_id else None
+            mood = session['mood'] if session else mood_analysis['mood']
+            yield 'mood', self._mood_event(mood_analysis, provisional=False, session=session)
+        
+            weather = await weather_task
+            yield 'weather', weather
+        
+            started = time.monotonic()
+            if deadline.expired:
+                # No time left to score; serve the unweighted mood list
+                deadline.degrade('scoring')
+                recommendations = self.get_food_recommendations(mood)
+            else:
+                recommendations = self.get_food_recommendations(mood, weather)
+            deadline.record('scoring', started)
+            yield 'recommendations', {'recommendations': recommendations}
+            
+            for stage, seconds in deadline.timings.items():
+                STAGE_LATENCY.observe(seconds, stage=stage)
+        
+            # Detailed emotion analysis; high volume, so DEBUG (and sampled per request)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Emotion analysis", extra={
+                    'mood': mood,
+                    'top_emotion': mood_analysis['top_emotion'],
+                    'intensity': round(mood_analysis['intensity'], 4),
+                    'secondary_emotions': mood_analysis['secondary_emotions']
+                })
+            if deadline.degraded:
+                logger.info("Degraded stages: %s", ', '.join(deadline.degraded),
+                            extra={'degraded': deadline.degraded, 'timings': deadline.timings})
+        
+            yield 'done', {
+                'mood': mood,
+                'mood_analysis': mood_analysis,
+                'recommendations': recommendations,
+                'weather': weather,
+                'session': session,
+                'degraded': deadline.degraded,
+                'timings': deadline.timings
+            }
+        finally:
+            # Don't leave the weather fetch running if the consumer stops early
+            if not weather_task.done():
+                weather_task.cancel()
+
+    async def _weather_stage(self, deadline: Deadline) -> Dict:
+        """Weather for the user's location within the weather budget, else default weather."""
+        started = time.monotonic()
+        budget = deadline.budget('weather')
+        try:
+            if budget <= 0:
+                raise asyncio.TimeoutError()
+            weather = await asyncio.wait_for(self.get_weather(self.user_data['location'], timeout=budget), budget)
+        except asyncio.TimeoutError:
+            deadline.degrade('weather')
+            weather = self.get_default_weather()
+        deadline.record('weather', started)
+        return weather
+
+    def _mood_event(self, mood_analysis: Dict, provisional: bool, session: Dict = None) -> Dict:
+        event = {
+            'mood': mood_analysis['mood'],
+            'intensity': mood_analysis['intensity'],
+            'top_emotion': mood_analysis['top_emotion'],
+            'provisional': provisional
+        }
+        if session:
+            # The conversation's mood leads; the message's own mood is kept alongside
+            event.update({'mood': session['mood'], 'message_mood': mood_analysis['mood'], 'session': session})
+        return event
+
+    async def run_blocking(self, func, *args):
+        """Await a blocking call on the recommender's worker threads."""
+        loop = asyncio.get_running_loop()
+        # Carry context variables (e.g. an active trace) over to the worker thread
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self.executor, partial(context.run, func, *args))
+
+    def neutral_mood_analysis(self) -> Dict:
+        """Mood analysis used when neither keywords nor the model produced a result."""
+        return {
+            "emotion_scores": [],
+            "mood": "neutral",
+            "intensity": 0.0,
+            "top_emotion": "neutral",
+            "secondary_emotions": []
+        }
+
+    async def recommend_batch(self, items: List[Dict]) -> List[Dict]:
+        """Recommend for many texts at once: one model call, one weather lookup per location.
+
+        Each item is a dict with 'text' and an optional 'location'. Results come
+        back in input order; items that fail carry an 'error' instead.
+        """
+        results: List[Optional[Dict]] = [None] * len(items)
+        analyses: Dict[int, Dict] = {}
+        needs_model = []
         
-        # Get weather
-        weather = await self.get_weather(self.user_data['location'])
+        for i, item in enumerate(items):
+            text = item.get('text') if isinstance(item, dict) else None
+            if not text or not isinstance(text, str):
+                results[i] = {'error': 'Text parameter is required'}
+                continue
+            keyword_match = self.match_mood_keywords(text)
+            if keyword_match and keyword_match['intensity'] > 0.5:
+                MOOD_PATH.inc(path='keyword')
+                analyses[i] = keyword_match
+            else:
+                needs_model.append(i)
         
-        # Get recommendations
-        recommendations = self.get_food_recommendations(mood, weather)
+        # Single batched model call for everything the keywords couldn't settle
+        if needs_model:
+            texts = [items[i]['text'] for i in needs_model]
+            try:
+                batch_scores = await self.run_blocking(self.classify_emotions_batch, texts)
+                for i, analysis in zip(needs_model, self.interpret_emotions_batch(texts, batch_scores)):
+                    analyses[i] = analysis
+            except Exception as e:
+                for i in needs_model:
+                    results[i] = {'error': f'Emotion analysis failed: {e}'}
         
-        # Print detailed emotion analysis
-        print(f"\nEmotion Analysis:")
-        print(f"Primary Emotion: {mood_analysis['top_emotion'].capitalize()} ({mood_analysis['intensity']:.2f})")
-        if mood_analysis['secondary_emotions']:
-            print(f"Secondary Emotions: {', '.join(mood_analysis['secondary_emotions'])}")
+        # Deduplicate weather lookups by location bucket and fetch them concurrently
+        locations = {}
+        for i in analyses:
+            location = items[i].get('location') or self.user_data['location']
+            locations.setdefault(self.weather_key(location), location)
+        keys = list(locations)
+        fetched = await asyncio.gather(*(self.get_weather(locations[key]) for key in keys))
+        weather_by_key = dict(zip(keys, fetched))
         
-        return mood, recommendations, weather 
\ No newline at end of file
+        for i, mood_analysis in analyses.items():
+            try:
+                location = items[i].get('location') or self.user_data['location']
+                weather = weather_by_key[self.weather_key(location)]
+                results[i] = {
+                    'mood': mood_analysis['mood'],
+                    'recommendations': self.get_food_recommendations(mood_analysis['mood'], weather),
+                    'weather': weather
+                }
+            except Exception as e:
+                results[i] = {'error': str(e)}
+        
+        return results
+
+    async def get_recommendation(self, text: str, deadline: Deadline = None) -> Tuple[str, List[str], Dict]:
+        """Get mood analysis and food recommendations for input text."""
+        result = await self.recommend(text, deadline)
+        return result['mood'], result['recommendations'], result['weather']
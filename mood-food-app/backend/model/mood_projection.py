@@ -0,0 +1,104 @@
+"""Mood scores from the full go_emotions distribution.
+
+Instead of picking a mood from the model's top three labels with
+first-match rules, distribution scoring keeps all 28 label probabilities
+as a vector and multiplies it by an emotion x mood weight matrix built
+once from the rule tables. A batch of texts is one (n x 28) @ (28 x moods)
+product, and every mood gets a score rather than only the first match.
+"""
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from model.rules import Rules
+
+# go_emotions labels, in the model's output order
+GO_EMOTIONS_LABELS = (
+    'admiration', 'amusement', 'anger', 'annoyance', 'approval', 'caring', 'confusion',
+    'curiosity', 'desire', 'disappointment', 'disapproval', 'disgust', 'embarrassment',
+    'excitement', 'fear', 'gratitude', 'grief', 'joy', 'love', 'nervousness', 'optimism',
+    'pride', 'realization', 'relief', 'remorse', 'sadness', 'surprise', 'neutral'
+)
+
+# Rows whose probabilities carry less mass than this on known labels have no signal
+MIN_SIGNAL = 1e-6
+
+
+def projection_labels(rules: Rules) -> tuple:
+    """go_emotions labels, then labels only the rule tables know (e.g. the lexicon's 'tiredness')."""
+    extra = [label for label in (*rules.emotion_mood_mapping, *rules.emotion_mood_weights)
+             if label not in GO_EMOTIONS_LABELS]
+    return GO_EMOTIONS_LABELS + tuple(dict.fromkeys(extra))
+
+
+class MoodProjection:
+    """Precomputed emotion x mood weights, plus the mood swap applied under negation."""
+
+    def __init__(self, rules: Rules, labels: Sequence[str] = None):
+        self.labels = tuple(labels) if labels is not None else projection_labels(rules)
+        self.label_index = {label: i for i, label in enumerate(self.labels)}
+        # Moods we can recommend food for
+        self.moods = tuple(rules.food_mood_mapping)
+        mood_index = {mood: j for j, mood in enumerate(self.moods)}
+
+        # Each label's row: explicit blended weights, else its mapped mood, else neutral
+        self.weights = np.zeros((len(self.labels), len(self.moods)))
+        for i, label in enumerate(self.labels):
+            row = rules.emotion_mood_weights.get(label) or {rules.emotion_mood_mapping.get(label, 'neutral'): 1.0}
+            for mood, weight in row.items():
+                self.weights[i, mood_index[mood]] = weight
+            self.weights[i] /= self.weights[i].sum()
+
+        # Negation moves each mood's score to its opposite, when the opposite is a scored mood
+        self.negation = np.eye(len(self.moods))
+        for mood, opposite in rules.opposite_moods.items():
+            if mood in mood_index and opposite in mood_index:
+                self.negation[mood_index[mood]] = 0.0
+                self.negation[mood_index[mood], mood_index[opposite]] = 1.0
+
+    def vectorize(self, batch_scores: List[List[Dict]]) -> np.ndarray:
+        """Pipeline output (one label/score list per text) as an (n x labels) matrix."""
+        # Labels outside the projection land in a spare last column that is dropped
+        unknown = len(self.labels)
+        columns = [self.label_index.get(score['label'], unknown) for scores in batch_scores for score in scores]
+        values = [score['score'] for scores in batch_scores for score in scores]
+        rows = np.repeat(np.arange(len(batch_scores)), [len(scores) for scores in batch_scores])
+        probabilities = np.zeros((len(batch_scores), unknown + 1))
+        probabilities[rows, columns] = values
+        return probabilities[:, :unknown]
+
+    def project(self, probabilities: np.ndarray, negated: Sequence[bool]) -> np.ndarray:
+        """Mood scores per text, normalized to sum to 1 (uniform when there is no signal)."""
+        moods = probabilities @ self.weights
+        negated = np.asarray(negated, dtype=bool)
+        if negated.any():
+            moods[negated] = moods[negated] @ self.negation
+        totals = moods.sum(axis=1, keepdims=True)
+        return np.divide(moods, totals, out=np.full_like(moods, 1 / len(self.moods)), where=totals > 0)
+
+    def interpret(self, batch_scores: List[List[Dict]], negated: Sequence[bool]) -> List[Optional[Dict]]:
+        """Mood analyses (the shape interpret_emotions returns) for a batch of pipeline outputs.
+
+        Rows with no signal on any known label come back as None rather than
+        as the argmax of a uniform distribution.
+        """
+        probabilities = self.vectorize(batch_scores)
+        signal = probabilities.sum(axis=1) >= MIN_SIGNAL
+        mood_scores = self.project(probabilities, negated)
+        best = mood_scores.argmax(axis=1)
+        top_labels = np.argsort(-probabilities, axis=1, kind='stable')[:, :3]
+        top_scores = np.take_along_axis(probabilities, top_labels, axis=1)
+        rows = zip(best.tolist(), mood_scores[np.arange(len(best)), best].tolist(), mood_scores.round(4).tolist(),
+                   top_labels.tolist(), top_scores.tolist())
+        return [
+            {
+                "emotion_scores": [{'label': self.labels[i], 'score': score} for i, score in zip(labels, scores)],
+                "mood": self.moods[mood],
+                "intensity": intensity,
+                "mood_scores": dict(zip(self.moods, row_scores)),
+                "top_emotion": self.labels[labels[0]],
+                "secondary_emotions": [self.labels[i] for i in labels[1:]]
+            }
+            if has_signal else None
+            for has_signal, (mood, intensity, row_scores, labels, scores) in zip(signal.tolist(), rows)
+        ]
@@ -0,0 +1,20 @@
+import contextlib
+import os
+import tempfile
+from pathlib import Path
+
+
+def atomic_write_text(path, text: str):
+    """Replace path with text via a temp file and rename, so readers never see a partial file."""
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+        # mkstemp creates the file owner-only; keep the permissions a plain open() would give
+        os.chmod(tmp, path.stat().st_mode if path.exists() else 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp)
+        raise
@@ -0,0 +1,175 @@
+"""Mood, food and weather rule tables shared by every recommender.
+
+The tables are loaded once per process from a JSON config and compiled
+into immutable structures (tuples, frozensets, read-only mappings and
+reverse indexes), so creating a recommender copies nothing and hot
+methods don't build lookup tables per call.
+"""
+import json
+import os
+from bisect import bisect_right
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, FrozenSet, Mapping, NamedTuple, Tuple
+
+# Bundled rule tables shipped alongside the model code; MOOD_RULES_FILE overrides
+RULES_FILE = Path(__file__).parent / "data" / "rules.json"
+
+
+class MoodLexicon(NamedTuple):
+    keywords: Tuple[str, ...]
+    intensifiers: FrozenSet[str]
+    context: FrozenSet[str]
+
+
+class ContextPhrases(NamedTuple):
+    positive: Tuple[str, ...]
+    negative: Tuple[str, ...]
+
+
+class SeasonProfile(NamedTuple):
+    temperature_range: Tuple[float, float]
+    preferred_styles: Tuple[str, ...]
+    ingredients: Tuple[str, ...]
+    avoid: Tuple[str, ...]
+
+
+class TemperatureBand(NamedTuple):
+    low: float
+    high: float
+    multipliers: Mapping[str, float]
+
+
+class WeatherCode(NamedTuple):
+    condition: str
+    rainy: bool
+    sunny: bool
+
+
+# Codes missing from the tables normalize to this
+UNKNOWN_WEATHER = WeatherCode('unknown', False, False)
+
+
+class Rules(NamedTuple):
+    negation_words: FrozenSet[str]
+    opposite_moods: Mapping[str, str]
+    mood_keywords: Mapping[str, MoodLexicon]
+    emotional_context: Mapping[str, ContextPhrases]
+    compound_patterns: Mapping[str, Tuple[FrozenSet[str], ...]]
+    emotion_mood_mapping: Mapping[str, str]
+    # Blended emotion -> mood weights, overriding emotion_mood_mapping in distribution scoring
+    emotion_mood_weights: Mapping[str, Mapping[str, float]]
+    food_mood_mapping: Mapping[str, Tuple[str, ...]]
+    weather_food_adjustments: Mapping[str, Tuple[str, ...]]
+    seasonal_preferences: Mapping[str, SeasonProfile]
+    temperature_adjustments: Mapping[str, TemperatureBand]
+    # Weatherbit code -> condition and the code-driven rainy/sunny flags
+    weather_codes: Mapping[int, WeatherCode]
+    # Reverse index: intensifier or context word -> moods it counts towards
+    cue_index: Mapping[str, Tuple[Tuple[str, str], ...]]
+    # Temperature bands sorted by lower bound, for bisect lookups
+    band_lows: Tuple[float, ...]
+    band_names: Tuple[str, ...]
+    bands: Tuple[TemperatureBand, ...]
+
+    def temperature_category(self, temperature: float) -> str:
+        return self.band_names[max(bisect_right(self.band_lows, temperature) - 1, 0)]
+
+    def temperature_band(self, temperature: float) -> TemperatureBand:
+        return self.bands[max(bisect_right(self.band_lows, temperature) - 1, 0)]
+
+    def cue_counts(self, words) -> Dict[Tuple[str, str], int]:
+        """Intensifier and context hits per mood, keyed by (mood, 'intensifiers'|'context')."""
+        counts: Dict[Tuple[str, str], int] = {}
+        for word in words:
+            for key in self.cue_index.get(word, ()):
+                counts[key] = counts.get(key, 0) + 1
+        return counts
+
+
+def _bound(value, default: float) -> float:
+    # JSON has no infinity; open-ended ranges use null
+    return default if value is None else float(value)
+
+
+def compile_weather_codes(raw: Dict) -> Dict[int, WeatherCode]:
+    """Flatten the condition code lists into one lookup table, rejecting overlaps."""
+    conditions: Dict[int, str] = {}
+    for condition, codes in raw['weather_conditions'].items():
+        for code in codes:
+            if code in conditions:
+                raise ValueError(f"Weather code {code} is listed under both "
+                                 f"'{conditions[code]}' and '{condition}'")
+            conditions[code] = condition
+    rainy = frozenset(raw['rainy_codes'])
+    sunny = frozenset(raw['sunny_codes'])
+    return {
+        code: WeatherCode(conditions.get(code, UNKNOWN_WEATHER.condition), code in rainy, code in sunny)
+        for code in sorted(conditions.keys() | rainy | sunny)
+    }
+
+
+def compile_rules(raw: Dict) -> Rules:
+    """Build the immutable rule tables from their JSON form."""
+    mood_keywords = {
+        mood: MoodLexicon(tuple(data['keywords']), frozenset(data['intensifiers']), frozenset(data['context']))
+        for mood, data in raw['mood_keywords'].items()
+    }
+    cue_index: Dict[str, list] = {}
+    for mood, lexicon in mood_keywords.items():
+        for kind in ('intensifiers', 'context'):
+            for word in getattr(lexicon, kind):
+                cue_index.setdefault(word, []).append((mood, kind))
+
+    temperature_adjustments = {
+        name: TemperatureBand(_bound(band['range'][0], -float('inf')), _bound(band['range'][1], float('inf')),
+                              MappingProxyType(dict(band['multipliers'])))
+        for name, band in raw['temperature_adjustments'].items()
+    }
+    bands = sorted(temperature_adjustments.items(), key=lambda item: item[1].low)
+
+    return Rules(
+        negation_words=frozenset(raw['negation_words']),
+        opposite_moods=MappingProxyType(dict(raw['opposite_moods'])),
+        mood_keywords=MappingProxyType(mood_keywords),
+        emotional_context=MappingProxyType({
+            mood: ContextPhrases(tuple(data['positive_context']), tuple(data['negative_context']))
+            for mood, data in raw['emotional_context'].items()
+        }),
+        compound_patterns=MappingProxyType({
+            mood: tuple(frozenset(pattern) for pattern in patterns)
+            for mood, patterns in raw['compound_patterns'].items()
+        }),
+        emotion_mood_mapping=MappingProxyType(dict(raw['emotion_mood_mapping'])),
+        emotion_mood_weights=MappingProxyType({
+            emotion: MappingProxyType(dict(weights))
+            for emotion, weights in raw.get('emotion_mood_weights', {}).items()
+        }),
+        food_mood_mapping=MappingProxyType({mood: tuple(foods) for mood, foods in raw['food_mood_mapping'].items()}),
+        weather_food_adjustments=MappingProxyType({
+            weather: tuple(styles) for weather, styles in raw['weather_food_adjustments'].items()
+        }),
+        seasonal_preferences=MappingProxyType({
+            season: SeasonProfile(tuple(data['temperature_range']), tuple(data['preferred_styles']),
+                                  tuple(data['ingredients']), tuple(data['avoid']))
+            for season, data in raw['seasonal_preferences'].items()
+        }),
+        temperature_adjustments=MappingProxyType(temperature_adjustments),
+        weather_codes=MappingProxyType(compile_weather_codes(raw)),
+        cue_index=MappingProxyType({word: tuple(keys) for word, keys in cue_index.items()}),
+        band_lows=tuple(band.low for _, band in bands),
+        band_names=tuple(name for name, _ in bands),
+        bands=tuple(band for _, band in bands)
+    )
+
+
+def load_rules(path: Path = RULES_FILE) -> Rules:
+    with open(path, 'r', encoding='utf-8') as f:
+        return compile_rules(json.load(f))
+
+
+@lru_cache(maxsize=1)
+def get_rules() -> Rules:
+    """Load the rule tables once per process."""
+    return load_rules(Path(os.getenv('MOOD_RULES_FILE') or RULES_FILE))
@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from model.metrics import SESSIONS
+
+
+class SessionMoodTracker:
+    """Running mood per chat session, so each message only needs its own analysis.
+
+    Every session keeps an emotion vector (label scores from the model or
+    lexicon) and a mood vector, both decaying with a half-life in seconds of
+    inactivity; a new message's scores are added on top, and the session's
+    mood and top emotion are the strongest entries. Sessions idle for ``ttl``
+    seconds expire, and at most ``max_sessions`` are kept, least recently
+    used first out, so memory stays bounded however many clients connect.
+    """
+
+    def __init__(self, half_life: float = 300, ttl: float = 1800, max_sessions: int = 10000):
+        self.half_life = half_life
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def update(self, session_id: str, mood_analysis: Dict) -> Dict:
+        """Fold one message's analysis into its session; returns the session's mood summary."""
+        now = time.monotonic()
+        # Distribution scoring gives every mood a share; otherwise the message counts for its one mood
+        message = mood_analysis.get('mood_scores') or {mood_analysis['mood']: mood_analysis['intensity']}
+        # Keyword matches carry no label scores; their top emotion stands in
+        emotions = {score['label']: score['score'] for score in mood_analysis['emotion_scores']} \
+            or {mood_analysis['top_emotion']: mood_analysis['intensity']}
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.pop(session_id, None)
+            if session is None:
+                session = {'moods': {}, 'emotions': {}, 'turns': 0}
+                SESSIONS.inc(event='started')
+            else:
+                decay = 0.5 ** ((now - session['updated_at']) / self.half_life)
+                session['moods'] = {mood: score * decay for mood, score in session['moods'].items()}
+                session['emotions'] = {label: score * decay for label, score in session['emotions'].items()}
+            for mood, score in message.items():
+                session['moods'][mood] = session['moods'].get(mood, 0.0) + score
+            for label, score in emotions.items():
+                session['emotions'][label] = session['emotions'].get(label, 0.0) + score
+            session['turns'] += 1
+            session['updated_at'] = now
+            self._sessions[session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                SESSIONS.inc(event='evicted')
+            return self._summary(session)
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        """Current summary for a session, or None if it is unknown or expired."""
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or now - session['updated_at'] > self.ttl:
+                return None
+            return self._summary(session)
+
+    def _expire(self, now: float):
+        # Oldest first, so stop at the first session that is still active
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session['updated_at'] <= self.ttl:
+                break
+            del self._sessions[session_id]
+            SESSIONS.inc(event='expired')
+
+    def _summary(self, session: Dict) -> Dict:
+        total = sum(session['moods'].values())
+        mood = max(session['moods'], key=session['moods'].get)
+        emotions = session['emotions']
+        emotion_total = sum(emotions.values())
+        return {
+            'mood': mood,
+            'intensity': session['moods'][mood] / total if total else 0.0,
+            'turns': session['turns'],
+            'mood_scores': {mood: round(score / total, 4) if total else 0.0
+                            for mood, score in session['moods'].items()},
+            'top_emotion': max(emotions, key=emotions.get),
+            # Strongest few only; the full vector grows with every label the session has seen
+            'emotion_scores': {label: round(score / emotion_total, 4) if emotion_total else 0.0
+                               for label, score in sorted(emotions.items(), key=lambda item: -item[1])[:5]}
+        }
+
+    def __len__(self) -> int:
+        return len(self._sessions)
@@ -0,0 +1,250 @@
+"""Opt-in per-request tracing and profiling.
+
+Trace hooks wrap recommender methods in place. They only do work when a
+trace is active in the current context, so untraced requests pay a single
+ContextVar lookup per call and get identical outputs.
+"""
+import asyncio
+import cProfile
+import heapq
+import io
+import itertools
+import json
+import os
+import pstats
+import queue
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Recommender methods timed when a trace is active
+TRACED_METHODS = (
+    'analyze_mood', 'match_mood_keywords', 'classify_emotions', 'classify_emotions_batch',
+    'interpret_emotions', 'interpret_emotions_batch', 'get_weather', 'fetch_weather',
+    'fetch_observation', 'get_food_recommendations', 'save_user_data'
+)
+
+_current_trace: ContextVar[Optional['Trace']] = ContextVar('moodfood_trace', default=None)
+
+
+class Trace:
+    """Timed spans recorded for one request."""
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.started = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.spans: List[Dict] = []
+        self.threads = {threading.get_ident()}
+        self._lock = threading.Lock()
+
+    def add_span(self, name: str, start: float, end: float):
+        with self._lock:
+            self.spans.append({
+                'name': name,
+                'start_ms': round((start - self.started) * 1000, 3),
+                'duration_ms': round((end - start) * 1000, 3),
+                'thread': threading.current_thread().name
+            })
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.started
+
+    def summary(self) -> Dict:
+        stages: Dict[str, Dict] = {}
+        for span in self.spans:
+            stage = stages.setdefault(span['name'], {'calls': 0, 'total_ms': 0.0})
+            stage['calls'] += 1
+            stage['total_ms'] = round(stage['total_ms'] + span['duration_ms'], 3)
+        return {
+            'request_id': self.request_id,
+            'duration_ms': round((self.duration or 0) * 1000, 3),
+            'stages': stages,
+            'spans': sorted(self.spans, key=lambda span: span['start_ms'])
+        }
+
+
+def _wrap(name: str, method):
+    if asyncio.iscoroutinefunction(method):
+        @wraps(method)
+        async def traced(*args, **kwargs):
+            trace = _current_trace.get()
+            if trace is None:
+                return await method(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                trace.add_span(name, start, time.perf_counter())
+    else:
+        @wraps(method)
+        def traced(*args, **kwargs):
+            trace = _current_trace.get()
+            if trace is None:
+                return method(*args, **kwargs)
+            trace.threads.add(threading.get_ident())
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                trace.add_span(name, start, time.perf_counter())
+    traced.__traced__ = True
+    return traced
+
+
+def install_trace_hooks(obj, names=TRACED_METHODS):
+    """Replace the named bound methods on obj with tracing wrappers (idempotent)."""
+    for name in names:
+        method = getattr(obj, name, None)
+        if method is not None and not getattr(method, '__traced__', False):
+            setattr(obj, name, _wrap(name, method))
+
+
+class SamplingProfiler:
+    """Samples the stacks of the threads a trace has touched at a fixed interval."""
+
+    def __init__(self, trace: Trace, interval: float = 0.001):
+        self.trace = trace
+        self.interval = interval
+        self.samples = Counter()
+        self.total = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='trace-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for ident in list(self.trace.threads):
+                frame = frames.get(ident)
+                if frame is not None:
+                    code = frame.f_code
+                    self.samples[f"{os.path.basename(code.co_filename)}:{frame.f_lineno} {code.co_name}"] += 1
+                    self.total += 1
+
+    def summary(self, top: int = 20) -> Dict:
+        return {
+            'kind': 'sample',
+            'interval_ms': self.interval * 1000,
+            'samples': self.total,
+            'top': [
+                {'location': location, 'samples': count, 'percent': round(100 * count / self.total, 1)}
+                for location, count in self.samples.most_common(top)
+            ]
+        }
+
+
+# cProfile hooks a whole thread, so only one request may profile with it at a time
+_cprofile_lock = threading.Lock()
+
+CPROFILE_SCOPE_NOTE = ("cProfile covers the whole event loop thread while this request ran, "
+                       "including any requests served concurrently on it")
+
+
+def _cprofile_summary(profile: cProfile.Profile, top: int = 25) -> Dict:
+    stream = io.StringIO()
+    pstats.Stats(profile, stream=stream).sort_stats('cumulative').print_stats(top)
+    return {'kind': 'cprofile', 'scope': 'event_loop_thread', 'note': CPROFILE_SCOPE_NOTE,
+            'report': stream.getvalue()}
+
+
+async def run_traced(coro, request_id: str, profile: Optional[str] = None) -> Tuple[object, Trace, Optional[Dict]]:
+    """Await coro with a trace active, optionally profiling it with 'cprofile' or 'sample'.
+
+    cProfile only sees the event loop thread, and everything else that ran on
+    it meanwhile (the summary says so); the sampler covers just the threads
+    this request's traced methods ran on. If another request is already
+    using cProfile, this one is sampled instead.
+    """
+    trace = Trace(request_id)
+    token = _current_trace.set(trace)
+    profiler = None
+    if profile == 'cprofile' and _cprofile_lock.acquire(blocking=False):
+        profiler = cProfile.Profile()
+        profiler.enable()
+    elif profile in ('cprofile', 'sample'):
+        profiler = SamplingProfiler(trace)
+        profiler.start()
+    try:
+        result = await coro
+    finally:
+        _current_trace.reset(token)
+        trace.finish()
+        if isinstance(profiler, cProfile.Profile):
+            profiler.disable()
+            _cprofile_lock.release()
+        elif profiler:
+            profiler.stop()
+    if isinstance(profiler, cProfile.Profile):
+        profile_summary = _cprofile_summary(profiler)
+    else:
+        profile_summary = profiler.summary() if profiler else None
+    return result, trace, profile_summary
+
+
+class SlowTraceRecorder:
+    """Traces a random sample of requests and keeps the slowest N as JSON files.
+
+    offer() only decides, under a lock, whether a trace is kept; writing and
+    deleting the files happens in order on a background thread, so no
+    request (or event loop) waits on the disk.
+    """
+
+    def __init__(self, directory: str, keep: int = 20, sample_rate: float = 0.0):
+        self.directory = Path(directory)
+        self.keep = keep
+        self.sample_rate = sample_rate
+        self._slowest: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+        self._writes: 'queue.Queue[Tuple[str, str, Optional[Trace]]]' = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+
+    def should_sample(self) -> bool:
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def offer(self, trace: Trace):
+        """Keep the trace if it is among the slowest seen, evicting the fastest kept one."""
+        duration = trace.duration or 0
+        with self._lock:
+            if self.keep <= 0 or (len(self._slowest) >= self.keep and duration <= self._slowest[0][0]):
+                return
+            # Request ids come from clients; only the filename-safe part goes into the name
+            request_id = re.sub(r'[^A-Za-z0-9_-]', '', trace.request_id or '')[:32]
+            path = self.directory / f"{int(duration * 1000):07d}ms_{next(self._sequence)}_{request_id}.json"
+            heapq.heappush(self._slowest, (duration, str(path)))
+            self._writes.put(('write', str(path), trace))
+            if len(self._slowest) > self.keep:
+                _, evicted = heapq.heappop(self._slowest)
+                self._writes.put(('remove', evicted, None))
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_files, name='trace-writer', daemon=True)
+                self._writer.start()
+
+    def _write_files(self):
+        while True:
+            action, path, trace = self._writes.get()
+            try:
+                if action == 'write':
+                    self.directory.mkdir(parents=True, exist_ok=True)
+                    with open(path, 'w') as f:
+                        json.dump(trace.summary(), f, indent=2)
+                else:
+                    os.remove(path)
+            except OSError:
+                pass
+            finally:
+                self._writes.task_done()
@@ -0,0 +1,113 @@
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from model.metrics import WEATHER_CACHE_LOOKUPS
+
+
+class WeatherCache:
+    """TTL cache of normalized weather, keyed by location bucket.
+
+    Besides the weather itself each entry remembers when it was last asked
+    for, so the prefetch scheduler can tell active locations from idle ones.
+    Entries are kept least recently requested first: those idle for
+    ``max_idle`` seconds are evicted on every get and put, and at most
+    ``max_entries`` are kept, so the cache stays bounded with or without the
+    prefetcher running.
+    """
+
+    def __init__(self, ttl: float = 600, refresh_margin: float = 120, max_idle: float = 1800,
+                 max_entries: int = 5000):
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self.max_idle = max_idle
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, location: str) -> Optional[Dict]:
+        """Return fresh weather for key, recording the request either way.
+
+        A miss means the caller is about to fetch the weather itself, so the
+        entry is held back from the prefetcher for a refresh margin rather
+        than being fetched twice.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._touch(key, location, now)
+            if entry['weather'] is not None and now - entry['fetched_at'] < self.ttl:
+                WEATHER_CACHE_LOOKUPS.inc(result='hit')
+                return entry['weather']
+            entry['refresh_at'] = max(entry['refresh_at'], now + self.refresh_margin)
+        WEATHER_CACHE_LOOKUPS.inc(result='miss')
+        return None
+
+    def _touch(self, key: str, location: str, now: float) -> Dict:
+        self._evict(now)
+        entry = self._entries.setdefault(key, {
+            'location': location,
+            'weather': None,
+            'fetched_at': None,
+            'refresh_at': now
+        })
+        entry['last_requested'] = now
+        self._entries.move_to_end(key)
+        self._enforce_size()
+        return entry
+
+    def _evict(self, now: float):
+        # Least recently requested first, so stop at the first entry that is still active
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if now - entry['last_requested'] <= self.max_idle:
+                break
+            del self._entries[key]
+
+    def _enforce_size(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def put(self, key: str, location: str, weather: Dict):
+        """Store weather and schedule a jittered refresh ahead of expiry."""
+        now = time.monotonic()
+        # Jitter spreads refreshes so buckets fetched together don't expire together
+        lead = self.refresh_margin * random.uniform(0.5, 1.0)
+        with self._lock:
+            self._evict(now)
+            if key not in self._entries:
+                self._entries[key] = {'location': location, 'last_requested': now}
+                self._enforce_size()
+            entry = self._entries[key]
+            entry.update({
+                'weather': weather,
+                'fetched_at': now,
+                'refresh_at': now + max(0.0, self.ttl - lead)
+            })
+
+    def defer(self, key: str, seconds: float):
+        """Push back the next refresh of key, e.g. after a failed fetch."""
+        with self._lock:
+            if key in self._entries:
+                self._entries[key]['refresh_at'] = time.monotonic() + seconds
+
+    def track(self, key: str, location: str):
+        """Mark a location as active without serving from the cache."""
+        with self._lock:
+            self._touch(key, location, time.monotonic())
+
+    def due(self, idle_timeout: float) -> List[Tuple[str, str]]:
+        """Active entries whose refresh time has passed; idle entries are evicted."""
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if now - entry['last_requested'] > idle_timeout:
+                    del self._entries[key]
+                elif now >= entry['refresh_at']:
+                    due.append((key, entry['location']))
+        return due
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,61 @@
+"""Turn raw Weatherbit observations into the recommender's weather dict.
+
+Condition and code-driven flags come from the precomputed code table in
+model.rules, so each observation costs one dict lookup plus a few
+threshold comparisons.
+"""
+from typing import Dict, List
+
+from model.rules import UNKNOWN_WEATHER, Rules
+
+
+def normalize_weather(current: Dict, rules: Rules) -> Dict:
+    """Normalize one entry of a Weatherbit /current response's data list."""
+    # Extract relevant weather information
+    temp = current['temp']
+    precip = current.get('precip', 0)
+    clouds = current.get('clouds', 0)
+    humidity = current.get('rh', 60)  # Relative humidity
+    wind_speed = current.get('wind_spd', 5)  # Wind speed in mph
+    code = rules.weather_codes.get(current['weather']['code'], UNKNOWN_WEATHER)
+
+    # Determine weather states with more nuanced thresholds
+    is_hot = temp > 80 or (temp > 75 and humidity > 70)  # Consider humidity for hot conditions
+    is_cold = temp < 40 or (temp < 45 and wind_speed > 15)  # Consider wind chill
+    is_rainy = precip > 0 or clouds > 70 or code.rainy
+    is_sunny = (
+        clouds < 30 and
+        precip == 0 and
+        code.sunny and
+        humidity < 80  # Consider humidity for sunny conditions
+    )
+
+    # Adjust temperature based on wind chill or heat index
+    feels_like = temp
+    if is_cold and wind_speed > 5:
+        # Simple wind chill calculation
+        feels_like = temp - (wind_speed * 0.1)
+    elif is_hot and humidity > 60:
+        # Simple heat index calculation
+        feels_like = temp + (humidity * 0.1)
+
+    return {
+        'temperature': temp,
+        'feels_like': feels_like,
+        'condition': code.condition,
+        'is_hot': is_hot,
+        'is_cold': is_cold,
+        'is_rainy': is_rainy,
+        'is_sunny': is_sunny,
+        'humidity': humidity,
+        'wind_speed': wind_speed,
+        'clouds': clouds,
+        'precip': precip
+    }
+
+
+def normalize_weather_batch(observations: List[Dict], rules: Rules) -> List[Dict]:
+    """Normalize many observations, e.g. every location refreshed in one prefetch tick."""
+    # A per-observation pass over the code table beats NumPy here: building the
+    # arrays and converting back to dicts costs more than the comparisons
+    return [normalize_weather(current, rules) for current in observations]
@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import random
+import threading
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from model.weather_cache import WeatherCache
+
+logger = logging.getLogger(__name__)
+
+
+class WeatherPrefetcher:
+    """Background refresher that keeps weather for active locations warm.
+
+    Runs its own event loop on a daemon thread so it works underneath both
+    the WSGI and ASGI servers. Each tick it asks the cache which active
+    entries are close to expiry and refreshes them, at most
+    ``max_concurrency`` at a time. Locations nobody has asked about for
+    ``idle_timeout`` seconds are dropped by the cache and stop being fetched.
+
+    With ``normalize`` set, ``fetch`` returns raw observations instead and
+    everything refreshed in a tick is normalized together in one batch.
+    """
+
+    def __init__(self, cache: WeatherCache, fetch: Callable[[str], Dict],
+                 key_for: Callable[[str], str], interval: float = 15,
+                 max_concurrency: int = 4, idle_timeout: float = 1800,
+                 normalize: Optional[Callable[[List[Dict]], List[Dict]]] = None):
+        self.cache = cache
+        self.fetch = fetch
+        self.normalize = normalize
+        self.key_for = key_for
+        self.interval = interval
+        self.max_concurrency = max_concurrency
+        self.idle_timeout = idle_timeout
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._in_flight = set()
+        # Running refreshes; the loop only keeps weak references to tasks
+        self._tasks: Set[asyncio.Task] = set()
+
+    def track(self, location: str):
+        """Register a location as active so it is prefetched before the first request."""
+        self.cache.track(self.key_for(location), location)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._run()),
+                                        name='weather-prefetch', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    async def _run(self):
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        while not self._stop.is_set():
+            due = [(key, location) for key, location in self.cache.due(self.idle_timeout)
+                   if key not in self._in_flight]
+            self._in_flight.update(key for key, _ in due)
+            if due and self.normalize:
+                self._spawn(self._refresh_batch(semaphore, due))
+            else:
+                for key, location in due:
+                    self._spawn(self._refresh(semaphore, key, location))
+            # Jittered tick so multiple workers don't poll in lockstep
+            await asyncio.sleep(self.interval * random.uniform(0.8, 1.2))
+
+    def _spawn(self, coroutine):
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _refresh(self, semaphore: asyncio.Semaphore, key: str, location: str):
+        try:
+            async with semaphore:
+                weather = await asyncio.to_thread(self.fetch, location)
+            self.cache.put(key, location, weather)
+        except Exception as e:
+            logger.warning("Weather prefetch failed for %s: %s", location, e)
+            self.cache.defer(key, self.interval * 4)
+        finally:
+            self._in_flight.discard(key)
+
+    async def _fetch(self, semaphore: asyncio.Semaphore, location: str) -> Dict:
+        async with semaphore:
+            return await asyncio.to_thread(self.fetch, location)
+
+    async def _refresh_batch(self, semaphore: asyncio.Semaphore, due: List[Tuple[str, str]]):
+        try:
+            results = await asyncio.gather(*(self._fetch(semaphore, location) for _, location in due),
+                                           return_exceptions=True)
+            fetched = []
+            for (key, location), result in zip(due, results):
+                if isinstance(result, Exception):
+                    logger.warning("Weather prefetch failed for %s: %s", location, result)
+                    self.cache.defer(key, self.interval * 4)
+                else:
+                    fetched.append((key, location, result))
+            if not fetched:
+                return
+            try:
+                weathers = self.normalize([observation for _, _, observation in fetched])
+            except Exception as e:
+                logger.warning("Weather normalization failed for %d locations: %s", len(fetched), e)
+                for key, _, _ in fetched:
+                    self.cache.defer(key, self.interval * 4)
+                return
+            for (key, location, _), weather in zip(fetched, weathers):
+                self.cache.put(key, location, weather)
+        finally:
+            self._in_flight.difference_update(key for key, _ in due)
@@ -0,0 +1,133 @@
+"""Concurrency stress test for the recommender's user data.
+
+Hammers update_user_preferences and toggle_weather from many threads while
+others read recommendations and the data file, then checks that no update
+was lost and that user_data.json was never seen torn:
+
+    python stress_test.py
+    python stress_test.py --threads 32 --ops 500
+
+Runs offline in a scratch directory with the stub classifier from
+benchmark.py; exits non-zero if any check fails.
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+from typing import Dict, List
+
+from benchmark import BACKEND_DIR, use_stub_classifier
+
+
+def writer(recommender, moods: List[str], ops: int, seed: int, toggles: List[int],
+           barrier: threading.Barrier):
+    rng = random.Random(seed)
+    barrier.wait()
+    for i in range(ops):
+        if rng.random() < 0.2:
+            recommender.toggle_weather()
+            toggles[seed] += 1
+        else:
+            # Foods unique per writer and op, so every update must survive
+            recommender.update_user_preferences(rng.choice(moods), f"food-{seed}-{i}")
+
+
+def reader(recommender, moods: List[str], stop: threading.Event, errors: List[str],
+           barrier: threading.Barrier):
+    rng = random.Random()
+    weather = recommender.get_default_weather()
+    barrier.wait()
+    while not stop.is_set():
+        try:
+            recommender.get_food_recommendations(rng.choice(moods), weather)
+            with open(recommender.data_file, 'r') as f:
+                json.load(f)
+        except FileNotFoundError:
+            continue
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+
+
+def check(recommender, expected: Dict, errors: List[str]) -> List[str]:
+    """Compare memory and disk against what the writers did."""
+    failures = [f"reader saw {len(errors)} errors, e.g. {errors[0]}"] if errors else []
+    with open(recommender.data_file, 'r') as f:
+        on_disk = json.load(f)
+    if on_disk != recommender.user_data:
+        failures.append("user_data.json differs from the in-memory user data")
+
+    for name, data in (('memory', recommender.user_data), ('disk', on_disk)):
+        history = [(entry['mood'], entry['food']) for entry in data['history']]
+        if len(history) != expected['updates']:
+            failures.append(f"{name}: {len(history)} history entries, expected {expected['updates']}")
+        stored = {(mood, food) for mood, foods in data['preferences'].items() for food in foods}
+        missing = set(history) - stored
+        if missing or len(stored) != expected['updates']:
+            failures.append(f"{name}: {len(stored)} stored preferences, {len(missing)} history entries missing")
+        if data['weather_enabled'] != expected['weather_enabled']:
+            failures.append(f"{name}: weather_enabled is {data['weather_enabled']}, "
+                            f"expected {expected['weather_enabled']}")
+    return failures
+
+
+def run(args) -> List[str]:
+    # Offline and isolated from the real user data file
+    os.environ['WEATHERBIT_API_KEY'] = ''
+    scratch = tempfile.TemporaryDirectory(prefix='moodfood-stress-')
+    os.chdir(scratch.name)
+    sys.path.insert(0, str(BACKEND_DIR))
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        use_stub_classifier()
+        from model.mood_food_model import MoodFoodRecommender
+        recommender = MoodFoodRecommender()
+        moods = list(recommender.food_mood_mapping)
+        initially_enabled = recommender.user_data.get('weather_enabled', True)
+
+        toggles = [0] * args.threads
+        errors: List[str] = []
+        stop = threading.Event()
+        barrier = threading.Barrier(args.threads + args.readers)
+        writers = [threading.Thread(target=writer, args=(recommender, moods, args.ops, seed, toggles, barrier))
+                   for seed in range(args.threads)]
+        readers = [threading.Thread(target=reader, args=(recommender, moods, stop, errors, barrier))
+                   for _ in range(args.readers)]
+        for thread in writers + readers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        stop.set()
+        for thread in readers:
+            thread.join()
+
+    expected = {
+        'updates': args.threads * args.ops - sum(toggles),
+        'weather_enabled': initially_enabled ^ (sum(toggles) % 2 == 1)
+    }
+    failures = check(recommender, expected, errors)
+    print(f"{args.threads} writers x {args.ops} ops ({sum(toggles)} toggles), {args.readers} readers")
+    os.chdir(BACKEND_DIR)
+    scratch.cleanup()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrency stress test for user data updates')
+    parser.add_argument('--threads', type=int, default=16, help='concurrent writer threads')
+    parser.add_argument('--readers', type=int, default=4, help='threads reading recommendations and the file')
+    parser.add_argument('--ops', type=int, default=100, help='updates or toggles per writer')
+    args = parser.parse_args()
+
+    failures = run(args)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    print("OK" if not failures else f"{len(failures)} checks failed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,73 @@
-import requests
+"""Manual API checks and a load generator.
+
+    python test_api.py                      # one health check and one recommendation
+    python test_api.py load --mode closed --concurrency 16 --duration 30
+    python test_api.py load --mode open --rps 50 --duration 30 --spawn --model-delay-ms 20
+
+--spawn starts the weather stub and the app (Flask, or --server asgi) on a
+free port with the stub emotion model, so the whole run is offline. Pass
+--real-model to load the real model in the spawned app instead.
+"""
+import argparse
 import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import requests
+
+BASE_URL = os.getenv('API_URL', 'http://localhost:5000')
+BACKEND_DIR = Path(__file__).resolve().parent
+
+PERCENTILES = (50, 95, 99, 99.9)
+
+# Request kinds and the default share of the workload each gets
+DEFAULT_MIX = 'keyword=6,model=3,location=1'
+KEYWORD_TEXTS = [
+    'I am feeling happy and energetic today!', 'So tired after work, need the couch',
+    'Really stressed about the deadline', 'Feeling romantic, date night with my partner',
+    'Kind of sad and lonely tonight', 'Very productive day, finished the project'
+]
+MODEL_TEXTS = [
+    'The meeting went on longer than expected', 'My commute turned out differently today',
+    'The weekend is coming up soon I guess', 'Dinner plans changed at the last minute',
+    'The exam was something else', 'Our trip keeps getting moved'
+]
+LOCATIONS = ['London', 'Paris', 'New York', 'Tokyo', 'Pune', 'Berlin', 'Sydney', 'Toronto']
+
+# Runs inside the spawned server process: swap in the stub model, then serve
+SERVER_BOOTSTRAP = """
+import sys
+server, port, model_delay = sys.argv[1], int(sys.argv[2]), float(sys.argv[3])
+if model_delay >= 0:
+    from benchmark import use_stub_classifier
+    use_stub_classifier(model_delay / 1000)
+if server == 'asgi':
+    import uvicorn
+    from asgi import app
+    uvicorn.run(app, host='127.0.0.1', port=port, log_level='warning')
+else:
+    from app import app
+    app.run(host='127.0.0.1', port=port, threaded=True)
+"""
+
 
 def test_health():
-    response = requests.get('http://localhost:5000/api/health')
+    response = requests.get(f'{BASE_URL}/api/health')
     print("Health Check Response:", response.json())
 
 def test_recommend():
     data = {'text': 'I am feeling happy and energetic today!'}
-    response = requests.post('http://localhost:5000/api/recommend', json=data)
+    response = requests.post(f'{BASE_URL}/api/recommend', json=data)
     print("Status Code:", response.status_code)
     print("Response Headers:", response.headers)
     print("Response Text:", response.text)
@@ -16,8 +76,258 @@ def test_recommend():
     except Exception as e:
         print("Error parsing JSON:", str(e))
 
+
+def parse_mix(mix: str) -> Tuple[List[str], List[float]]:
+    kinds, weights = [], []
+    for part in mix.split(','):
+        kind, _, weight = part.partition('=')
+        if kind not in ('keyword', 'model', 'location'):
+            raise ValueError(f"Unknown request kind '{kind}'")
+        kinds.append(kind)
+        weights.append(float(weight or 1))
+    return kinds, weights
+
+
+class LoadGenerator:
+    """Sends a weighted mix of requests and records (kind, status, latency) per request."""
+
+    def __init__(self, base_url: str, mix: str, clients: int, timeout: float, seed: int = 0):
+        self.base_url = base_url.rstrip('/')
+        self.kinds, self.weights = parse_mix(mix)
+        self.clients = clients
+        self.timeout = timeout
+        self.random = random.Random(seed)
+        self.samples: List[Tuple[str, int, float]] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def next_request(self) -> Tuple[str, str, Dict, str]:
+        """Pick (kind, path, body, client id) for the next request."""
+        with self._lock:
+            kind = self.random.choices(self.kinds, self.weights)[0]
+            client = f'load-{self.random.randrange(self.clients)}'
+            if kind == 'location':
+                return kind, '/api/location', {'location': self.random.choice(LOCATIONS)}, client
+            texts = KEYWORD_TEXTS if kind == 'keyword' else MODEL_TEXTS
+            return kind, '/api/recommend', {'text': self.random.choice(texts)}, client
+
+    def send(self, request: Tuple[str, str, Dict, str], started: float):
+        """Send one request; latency is measured from `started`, its scheduled start."""
+        kind, path, body, client = request
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        try:
+            response = session.post(self.base_url + path, json=body, timeout=self.timeout,
+                                    headers={'X-Client-Id': client})
+            status = response.status_code
+        except requests.exceptions.RequestException:
+            status = 0
+        latency = time.perf_counter() - started
+        with self._lock:
+            self.samples.append((kind, status, latency))
+
+    def run_closed(self, concurrency: int, duration: float):
+        """Each of `concurrency` workers sends its next request as soon as the last returns."""
+        stop_at = time.perf_counter() + duration
+
+        def worker():
+            while time.perf_counter() < stop_at:
+                request = self.next_request()
+                self.send(request, time.perf_counter())
+
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def run_open(self, rps: float, duration: float, max_outstanding: int):
+        """Start requests on a fixed schedule regardless of how fast responses come back.
+
+        Latency counts from the scheduled start, so queueing behind a slow
+        server is included rather than hidden (no coordinated omission).
+        """
+        interval = 1 / rps
+        total = int(rps * duration)
+        with ThreadPoolExecutor(max_workers=max_outstanding) as pool:
+            began = time.perf_counter()
+            for index in range(total):
+                scheduled = began + index * interval
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(self.send, self.next_request(), scheduled)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(samples: List[Tuple[str, int, float]], elapsed: float) -> Dict:
+    """Per-kind and overall counts, error rates, throughput and latency percentiles (ms)."""
+    groups: Dict[str, List[Tuple[str, int, float]]] = {'all': samples}
+    for sample in samples:
+        groups.setdefault(sample[0], []).append(sample)
+
+    report = {}
+    for kind, group in groups.items():
+        latencies = sorted(sample[2] * 1000 for sample in group if 200 <= sample[1] < 300)
+        rejected = sum(1 for sample in group if sample[1] == 429)
+        errors = sum(1 for sample in group if not 200 <= sample[1] < 300 and sample[1] != 429)
+        report[kind] = {
+            'requests': len(group),
+            'ok': len(latencies),
+            'rejected_429': rejected,
+            'errors': errors,
+            'error_rate': errors / len(group) if group else 0.0,
+            'throughput_rps': len(latencies) / elapsed if elapsed else 0.0,
+            'latency_ms': {f'p{pct:g}': percentile(latencies, pct) for pct in PERCENTILES}
+        }
+        if latencies:
+            report[kind]['latency_ms']['max'] = latencies[-1]
+    return report
+
+
+def print_report(report: Dict, elapsed: float):
+    header = f"{'kind':<10} {'reqs':>7} {'ok':>7} {'429':>6} {'err%':>6} {'rps':>8}"
+    header += ''.join(f" {'p' + format(pct, 'g'):>9}" for pct in PERCENTILES)
+    print(f"\nElapsed {elapsed:.1f}s (latency in ms)")
+    print(header)
+    for kind, stats in report.items():
+        line = (f"{kind:<10} {stats['requests']:>7} {stats['ok']:>7} {stats['rejected_429']:>6} "
+                f"{stats['error_rate'] * 100:>5.1f}% {stats['throughput_rps']:>8.1f}")
+        line += ''.join(f" {stats['latency_ms'][f'p{pct:g}']:>9.1f}" for pct in PERCENTILES)
+        print(line)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def spawn_server(args, scratch: str) -> Tuple[subprocess.Popen, str]:
+    """Start the weather stub in-process and the app in a subprocess; returns (process, base URL)."""
+    from weather_stub import StubConfig, start_stub_server
+
+    _, weather_url = start_stub_server(StubConfig(latency_ms=args.weather_latency_ms,
+                                                  error_rate=args.weather_error_rate))
+    port = free_port()
+    env = dict(os.environ,
+               PYTHONPATH=os.pathsep.join(filter(None, [str(BACKEND_DIR), os.getenv('PYTHONPATH')])),
+               WEATHERBIT_API_KEY='stub',
+               WEATHERBIT_BASE_URL=weather_url,
+               WEATHER_PREFETCH='0')
+    if not args.rate_limit:
+        env['CLIENT_RATE_LIMIT'] = '0'
+    else:
+        # The load generator stands in for a proxy, so its X-Client-Id spreads the limits
+        env['TRUSTED_PROXIES'] = '127.0.0.1'
+    model_delay = -1 if args.real_model else args.model_delay_ms
+    log = open(Path(scratch) / 'server.log', 'w')
+    process = subprocess.Popen(
+        [sys.executable, '-c', SERVER_BOOTSTRAP, args.server, str(port), str(model_delay)],
+        cwd=scratch, env=env, stdout=subprocess.DEVNULL, stderr=log
+    )
+    base_url = f'http://127.0.0.1:{port}'
+
+    deadline = time.monotonic() + args.startup_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            break
+        try:
+            if requests.get(f'{base_url}/api/health', timeout=1).status_code == 200:
+                return process, base_url
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.2)
+    process.kill()
+    log.close()
+    raise RuntimeError(f"Server did not become healthy; see {log.name}:\n"
+                       + (Path(scratch) / 'server.log').read_text()[-2000:])
+
+
+def load_test(args):
+    scratch = tempfile.mkdtemp(prefix='moodfood-load-')
+    process = None
+    base_url = args.url
+    if args.spawn:
+        process, base_url = spawn_server(args, scratch)
+        print(f"Spawned {args.server} server at {base_url} (logs in {scratch})")
+
+    try:
+        generator = LoadGenerator(base_url, args.mix, args.clients, args.timeout, args.seed)
+        if args.warmup:
+            LoadGenerator(base_url, args.mix, args.clients, args.timeout, args.seed).run_closed(
+                min(args.concurrency, 4), args.warmup)
+
+        if args.mode == 'open':
+            print(f"Open loop: {args.rps} req/s for {args.duration}s, mix {args.mix}")
+        else:
+            print(f"Closed loop: {args.concurrency} workers for {args.duration}s, mix {args.mix}")
+        started = time.perf_counter()
+        if args.mode == 'open':
+            generator.run_open(args.rps, args.duration, args.max_outstanding)
+        else:
+            generator.run_closed(args.concurrency, args.duration)
+        elapsed = time.perf_counter() - started
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=10)
+
+    report = summarize(generator.samples, elapsed)
+    print_report(report, elapsed)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'mode': args.mode, 'rps': args.rps, 'concurrency': args.concurrency,
+                       'duration': args.duration, 'mix': args.mix, 'elapsed': elapsed,
+                       'results': report}, f, indent=2)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mood Food API checks and load generator')
+    subparsers = parser.add_subparsers(dest='command')
+
+    load = subparsers.add_parser('load', help='run a load test')
+    load.add_argument('--url', default=BASE_URL, help='server to load (ignored with --spawn)')
+    load.add_argument('--mode', choices=['open', 'closed'], default='closed')
+    load.add_argument('--rps', type=float, default=20, help='open loop: requests started per second')
+    load.add_argument('--max-outstanding', type=int, default=256,
+                      help='open loop: cap on requests in flight from the generator')
+    load.add_argument('--concurrency', type=int, default=8, help='closed loop: concurrent workers')
+    load.add_argument('--duration', type=float, default=30, help='seconds of measured load')
+    load.add_argument('--warmup', type=float, default=2, help='unmeasured seconds before the run')
+    load.add_argument('--mix', default=DEFAULT_MIX, help='weighted request kinds, e.g. keyword=6,model=3,location=1')
+    load.add_argument('--clients', type=int, default=64, help='distinct X-Client-Id values to spread requests over')
+    load.add_argument('--timeout', type=float, default=10)
+    load.add_argument('--seed', type=int, default=0)
+    load.add_argument('--output', help='write the report as JSON')
+
+    load.add_argument('--spawn', action='store_true', help='start the weather stub and app locally')
+    load.add_argument('--server', choices=['flask', 'asgi'], default='flask')
+    load.add_argument('--real-model', action='store_true', help='load the real emotion model when spawning')
+    load.add_argument('--model-delay-ms', type=float, default=20, help='stub model latency when spawning')
+    load.add_argument('--weather-latency-ms', type=float, default=40)
+    load.add_argument('--weather-error-rate', type=float, default=0)
+    load.add_argument('--rate-limit', action='store_true', help='keep per-client rate limits in the spawned app')
+    load.add_argument('--startup-timeout', type=float, default=120)
+
+    args = parser.parse_args()
+    if args.command == 'load':
+        load_test(args)
+    else:
+        print("Testing API endpoints...")
+        test_health()
+        print("\nTesting recommendation endpoint...")
+        test_recommend()
+
+
 if __name__ == '__main__':
-    print("Testing API endpoints...")
-    test_health()
-    print("\nTesting recommendation endpoint...")
-    test_recommend() 
\ No newline at end of file
+    main()
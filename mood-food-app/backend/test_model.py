@@ -0,0 +1,195 @@
+"""Offline checks of the recommender's mood and food logic (no server, no model download).
+
+    python -m pytest test_model.py
+    python test_model.py
+"""
+import datetime
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import requests
+
+BACKEND_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Offline and isolated from the real user data file
+os.environ['WEATHERBIT_API_KEY'] = ''
+os.environ['WEATHER_PREFETCH'] = '0'
+os.environ['LOG_LEVEL'] = 'WARNING'
+os.chdir(tempfile.mkdtemp(prefix='moodfood-test-'))
+
+
+def keyword_recommender(scoring: str = 'distribution'):
+    """A recommender backed by the lexicon scorer, so nothing imports transformers."""
+    os.environ['MOOD_ANALYZER'] = 'keyword'
+    os.environ['MOOD_SCORING'] = scoring
+    from model.mood_food_model import MoodFoodRecommender
+    return MoodFoodRecommender()
+
+
+def test_distribution_without_signal_is_neutral():
+    recommender = keyword_recommender()
+    neutral = recommender.neutral_mood_analysis()
+    # No labels at all, and only labels the projection doesn't know
+    analyses = recommender.interpret_emotions_batch(
+        ['', 'hmm'], [[], [{'label': 'unheard-of', 'score': 0.9}]])
+    assert analyses == [neutral, neutral]
+
+
+def test_distribution_maps_lexicon_only_labels():
+    recommender = keyword_recommender()
+    assert {'tiredness', 'boredom'} <= set(recommender.projection.labels)
+
+    analysis = recommender.interpret_emotions('long night shift, yawn', [[{'label': 'tiredness', 'score': 1.0}]])
+    assert analysis['mood'] == 'tired'
+    assert analysis['top_emotion'] == 'tiredness'
+    assert analysis['intensity'] == 1.0
+
+    analysis = recommender.analyze_mood('long night shift, yawn')
+    assert analysis['mood'] == 'tired'
+    assert analysis['top_emotion'] == 'tiredness'
+
+
+def test_distribution_rejects_unmapped_lexicon_labels():
+    lexicon = Path(tempfile.mkdtemp(prefix='moodfood-test-')) / 'lexicon.json'
+    lexicon.write_text('{"joy": ["great"], "wanderlust": ["travel"]}')
+    os.environ['MOOD_LEXICON'] = str(lexicon)
+    try:
+        keyword_recommender()
+    except ValueError as error:
+        assert 'wanderlust' in str(error)
+    else:
+        raise AssertionError("unmapped lexicon label was accepted")
+    finally:
+        del os.environ['MOOD_LEXICON']
+
+
+def test_session_tracks_decayed_emotions():
+    from model.session_mood import SessionMoodTracker
+    sessions = SessionMoodTracker(half_life=300)
+    sessions.update('chat', {'mood': 'sad', 'intensity': 0.9, 'top_emotion': 'sadness',
+                             'emotion_scores': [{'label': 'sadness', 'score': 0.9}]})
+    summary = sessions.update('chat', {'mood': 'happy', 'intensity': 0.4, 'top_emotion': 'happy',
+                                       'emotion_scores': []})
+    assert summary['turns'] == 2
+    assert summary['mood'] == 'sad'
+    assert summary['top_emotion'] == 'sadness'
+    assert set(summary['emotion_scores']) == {'sadness', 'happy'}
+
+
+def test_preferred_food_moves_up():
+    recommender = keyword_recommender(scoring='rules')
+    recommender.user_data['weather_enabled'] = True
+    weather = {'temperature': 68}
+    foods = recommender.food_mood_mapping['sad']
+    before = recommender.rank_foods('sad', foods, 68, 'spring')
+    recommender.get_food_recommendations('sad', weather)  # caches the ranking
+    preferred = next(food for food in reversed(foods) if food not in before)
+
+    recommender.update_user_preferences('sad', preferred)
+    assert recommender.rank_foods('sad', foods, 68, 'spring')[0] == preferred
+    # The ranking cached before the preference changed is not reused
+    season = recommender.get_season(datetime.datetime.now().month)
+    after = recommender.get_food_recommendations('sad', weather)
+    assert after == list(recommender.rank_foods('sad', foods, 68, season))
+
+
+def test_artifact_checksums_are_verified():
+    from model.artifact import sha256, verify_artifact
+    model_dir = Path(tempfile.mkdtemp(prefix='moodfood-test-'))
+    weights = model_dir / 'model.safetensors'
+    weights.write_bytes(b'weights')
+    manifest = {'model': 'test', 'files': {weights.name: sha256(weights)}}
+    (model_dir / 'artifact.json').write_text(json.dumps(manifest))
+    assert verify_artifact(model_dir) == manifest
+
+    weights.write_bytes(b'tampered')
+    try:
+        verify_artifact(model_dir)
+    except ValueError as error:
+        assert 'checksum' in str(error)
+    else:
+        raise AssertionError("modified weights were accepted")
+
+
+class RecordingHttp:
+    """Stands in for the recommender's requests session; every location is valid."""
+
+    def __init__(self):
+        self.calls = []
+
+    def get(self, url, params=None, **kwargs):
+        self.calls.append(params)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps({'data': [{'city_name': params.get('city')}]}).encode()
+        return response
+
+
+def test_prefix_of_a_known_city_is_only_a_suggestion():
+    from model.gazetteer import get_gazetteer
+    gazetteer = get_gazetteer()
+    assert gazetteer.lookup('Hyde') is None
+    assert gazetteer.lookup('Salt') is None
+    assert gazetteer.suggest('Hyde').name == 'Hyderabad'
+    assert gazetteer.lookup('Salt Lake City').name == 'Salt Lake City'
+
+    # Not in the table, so the name goes to Weatherbit as typed
+    recommender = keyword_recommender(scoring='rules')
+    recommender.weatherbit_api_key = 'test'
+    recommender.http = RecordingHttp()
+    for town in ('Hyde', 'Salt'):
+        recommender.set_location(town)
+        assert recommender.http.calls[-1]['city'] == town
+        assert recommender.user_data['location'] == town
+
+
+class RecordingAnalyzer:
+    """Pipeline stand-in that records the keyword arguments of every call."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts, **kwargs):
+        self.calls.append(kwargs)
+        texts = [texts] if isinstance(texts, str) else texts
+        return [[{'label': 'neutral', 'score': 1.0}] for _ in texts]
+
+
+def test_batches_reach_the_pipeline_batched():
+    recommender = keyword_recommender(scoring='rules')
+    analyzer = RecordingAnalyzer()
+    recommender.sentiment_analyzer = analyzer
+
+    recommender.classify_emotions_batch(['first', 'second', 'third'])
+    assert analyzer.calls[-1]['batch_size'] == 3
+
+    recommender.model_batch_size = 2
+    recommender.classify_emotions_batch(['first', 'second', 'third'])
+    assert analyzer.calls[-1]['batch_size'] == 2
+
+    recommender.warm_up_analyzer(analyzer, rounds=1)
+    assert max(call.get('batch_size', 1) for call in analyzer.calls[2:]) > 1
+
+
+def test_overloaded_requests_keep_the_rate_budget():
+    from model.admission import AdmissionController
+    admission = AdmissionController(max_in_flight=1, client_rate=0.001, client_burst=2)
+    assert admission.try_admit('client').admitted
+    # The lane is full; these are shed without spending the client's last token
+    for _ in range(5):
+        assert admission.try_admit('client').reason == 'overloaded'
+    admission.release()
+    assert admission.try_admit('client').admitted
+    admission.release()
+    assert admission.try_admit('client').reason == 'rate_limited'
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"{name}: ok")
@@ -0,0 +1,190 @@
+"""Local stand-in for the Weatherbit /current endpoint.
+
+Serves the response shape MoodFoodRecommender.fetch_weather parses, with
+configurable latency, error and rate-limit injection, and can record real
+responses to a fixture file or replay them offline.
+
+Point the recommender at it with WEATHERBIT_BASE_URL, e.g.:
+
+    python weather_stub.py --port 8081 --latency 40 --error-rate 0.02
+    WEATHERBIT_BASE_URL=http://127.0.0.1:8081/v2.0 WEATHERBIT_API_KEY=stub python app.py
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+import requests
+
+WEATHER_CODES = [
+    (800, 'Clear sky'), (801, 'Few clouds'), (802, 'Scattered clouds'),
+    (803, 'Broken clouds'), (804, 'Overcast clouds'), (500, 'Light rain'),
+    (502, 'Heavy rain'), (201, 'Thunderstorm with rain'), (600, 'Light snow'),
+    (741, 'Fog')
+]
+
+
+class StubConfig:
+    def __init__(self, latency_ms: float = 0, jitter_ms: float = 0, error_rate: float = 0,
+                 rate_limit_rate: float = 0, mode: str = 'synthetic',
+                 fixtures: Optional[Path] = None, upstream: str = 'https://api.weatherbit.io/v2.0',
+                 seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.mode = mode
+        self.fixtures = Path(fixtures) if fixtures else None
+        self.upstream = upstream.rstrip('/')
+        self.seed = seed
+        self.recorded: Dict[str, Dict] = {}
+        self.lock = threading.Lock()
+        self.random = random.Random(seed)
+        self.requests_served = 0
+        if self.fixtures and self.fixtures.exists():
+            with open(self.fixtures, 'r') as f:
+                self.recorded = json.load(f)
+
+    def save_fixtures(self):
+        if self.fixtures:
+            with self.lock:
+                with open(self.fixtures, 'w') as f:
+                    json.dump(self.recorded, f, indent=2, sort_keys=True)
+
+
+def fixture_key(params: Dict[str, str]) -> str:
+    """Stable key for a query, ignoring the API key."""
+    return urlencode(sorted((k, v) for k, v in params.items() if k != 'key'))
+
+
+def synthetic_observation(params: Dict[str, str], seed: int = 0) -> Dict:
+    """Deterministic, plausible observation for the requested location."""
+    location = params.get('city') or f"{params.get('lat')},{params.get('lon')}"
+    digest = hashlib.sha256(f"{seed}:{location}".encode()).digest()
+    rng = random.Random(digest)
+    code, description = rng.choice(WEATHER_CODES)
+    raining = code < 700
+    return {
+        'city_name': params.get('city', location),
+        'lat': float(params['lat']) if 'lat' in params else round(rng.uniform(-60, 60), 2),
+        'lon': float(params['lon']) if 'lon' in params else round(rng.uniform(-180, 180), 2),
+        'temp': round(rng.uniform(10, 100), 1),
+        'precip': round(rng.uniform(0.1, 5), 2) if raining else 0,
+        'clouds': rng.randint(60, 100) if raining or code >= 803 else rng.randint(0, 40),
+        'rh': rng.randint(20, 95),
+        'wind_spd': round(rng.uniform(0, 25), 1),
+        'weather': {'code': code, 'description': description, 'icon': 'c01d'},
+        'ob_time': time.strftime('%Y-%m-%d %H:%M')
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    config: StubConfig = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        config = self.config
+        url = urlparse(self.path)
+        params = dict(parse_qsl(url.query))
+
+        delay = config.latency_ms + config.random.uniform(-config.jitter_ms, config.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+        with config.lock:
+            config.requests_served += 1
+            roll = config.random.random()
+
+        if not url.path.endswith('/current'):
+            return self._send(404, {'error': 'Not found'})
+        if roll < config.rate_limit_rate:
+            return self._send(429, {'error': 'API key rate limit exceeded'}, {'Retry-After': '1'})
+        if roll < config.rate_limit_rate + config.error_rate:
+            return self._send(500, {'error': 'Internal server error'})
+
+        status, body = self._observe(params)
+        self._send(status, body)
+
+    def _observe(self, params: Dict[str, str]) -> Tuple[int, Dict]:
+        config = self.config
+        key = fixture_key(params)
+        if config.mode == 'replay':
+            if key not in config.recorded:
+                return 404, {'error': f'No recorded fixture for {key}'}
+            return 200, config.recorded[key]
+        if config.mode == 'record':
+            response = requests.get(f"{config.upstream}/current", params=params, timeout=10)
+            if response.status_code != 200:
+                return response.status_code, {'error': response.text}
+            body = response.json()
+            with config.lock:
+                config.recorded[key] = body
+            config.save_fixtures()
+            return 200, body
+        return 200, {'count': 1, 'data': [synthetic_observation(params, config.seed)]}
+
+    def _send(self, status: int, body: Dict, headers: Dict[str, str] = None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def make_server(config: StubConfig, host: str, port: int) -> ThreadingHTTPServer:
+    handler = type('ConfiguredStubHandler', (StubHandler,), {'config': config})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_stub_server(config: StubConfig = None, host: str = '127.0.0.1',
+                      port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """Start the stub on a background thread; returns the server and its base URL."""
+    server = make_server(config or StubConfig(), host, port)
+    threading.Thread(target=server.serve_forever, name='weather-stub', daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v2.0"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local Weatherbit /current stand-in')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency', type=float, default=0, help='mean added latency in ms')
+    parser.add_argument('--jitter', type=float, default=0, help='+/- latency jitter in ms')
+    parser.add_argument('--error-rate', type=float, default=0, help='fraction of 500 responses')
+    parser.add_argument('--rate-limit-rate', type=float, default=0, help='fraction of 429 responses')
+    parser.add_argument('--mode', choices=['synthetic', 'record', 'replay'], default='synthetic')
+    parser.add_argument('--fixtures', type=Path, help='fixture file for record/replay')
+    parser.add_argument('--upstream', default='https://api.weatherbit.io/v2.0')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.mode != 'synthetic' and not args.fixtures:
+        parser.error('--fixtures is required for record and replay modes')
+
+    config = StubConfig(args.latency, args.jitter, args.error_rate, args.rate_limit_rate,
+                        args.mode, args.fixtures, args.upstream, args.seed)
+    server = make_server(config, args.host, args.port)
+    print(f"Weatherbit stub ({args.mode}) on http://{args.host}:{args.port}/v2.0")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        config.save_fixtures()
+
+
+if __name__ == '__main__':
+    main()
@@ -93,6 +93,45 @@ interface StoredRecommendation {
   timestamp: string;
 }
 
+interface DetectedMood {
+  mood: string;
+  provisional: boolean;
+}
+
+type StreamEvent =
+  | { event: 'mood'; data: DetectedMood }
+  | { event: 'recommendations'; data: { recommendations: string[] } }
+  | { event: 'error'; data: { error: string } }
+  | { event: 'weather' | 'done'; data: unknown };
+
+// Read an NDJSON response body, calling onEvent for every complete line
+const readEventStream = async (response: Response, onEvent: (event: StreamEvent) => void) => {
+  const reader = response.body!.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    const lines = buffer.split('\n');
+    buffer = lines.pop() || '';
+    lines.filter(line => line.trim()).forEach(line => onEvent(JSON.parse(line)));
+  }
+  if (buffer.trim()) {
+    onEvent(JSON.parse(buffer));
+  }
+};
+
+// One chat session per browser tab, so the backend can carry the mood across messages
+const getSessionId = () => {
+  let sessionId = sessionStorage.getItem('moodFoodSessionId');
+  if (!sessionId) {
+    sessionId = crypto.randomUUID();
+    sessionStorage.setItem('moodFoodSessionId', sessionId);
+  }
+  return sessionId;
+};
+
 function App() {
   const [mood, setMood] = useState('');
   const [recommendations, setRecommendations] = useState<FoodRecommendation[]>([]);
@@ -104,6 +143,7 @@ function App() {
   const [showConfirmation, setShowConfirmation] = useState(false);
   const [location, setLocation] = useState<string>('');
   const [temperature, setTemperature] = useState<number | null>(null);
+  const [detectedMood, setDetectedMood] = useState<DetectedMood | null>(null);
 
   useEffect(() => {
     // Load stored recommendations from localStorage
@@ -149,6 +189,7 @@ function App() {
     setRecommendations([]);
     setSelectedFood('');
     setShowSelection(false);
+    setDetectedMood(null);
 
     // Check if we have a stored recommendation for this mood
     const storedRec = storedRecommendations.find(
@@ -167,7 +208,8 @@ function App() {
     }
 
     try {
-      const response = await fetch('http://localhost:5000/api/recommend', {
+      // Stream stages so the detected mood shows before recommendations are ready
+      const response = await fetch('http://localhost:5000/api/recommend?stream=ndjson', {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -175,7 +217,8 @@ function App() {
         body: JSON.stringify({ 
           text: mood,
           temperature: temperature,
-          location: location
+          location: location,
+          session_id: getSessionId()
         }),
       });
 
@@ -183,13 +226,21 @@ function App() {
         throw new Error('Failed to get recommendations');
       }
 
-      const data = await response.json();
-      const newRecommendations = data.recommendations.map((rec: string) => ({
-        name: rec,
-        confidence: 1.0
-      }));
-      setRecommendations(newRecommendations);
-      setShowSelection(true);
+      await readEventStream(response, (streamEvent) => {
+        if (streamEvent.event === 'mood') {
+          const { mood: detected, provisional } = streamEvent.data;
+          setDetectedMood({ mood: detected, provisional });
+        } else if (streamEvent.event === 'recommendations') {
+          const newRecommendations = streamEvent.data.recommendations.map(rec => ({
+            name: rec,
+            confidence: 1.0
+          }));
+          setRecommendations(newRecommendations);
+          setShowSelection(true);
+        } else if (streamEvent.event === 'error') {
+          throw new Error(streamEvent.data.error);
+        }
+      });
     } catch (err) {
       setError('Failed to get food recommendations. Please try again.');
       console.error('Error:', err);
@@ -318,6 +369,18 @@ function App() {
               </Grid>
             </form>
 
+            {detectedMood && (
+              <Typography 
+                color="text.secondary" 
+                sx={{ 
+                  mt: 2,
+                  px: { xs: 2, sm: 0 }
+                }}
+              >
+                Detected mood: {detectedMood.mood}{detectedMood.provisional ? ' (refining...)' : ''}
+              </Typography>
+            )}
+
             {error && (
               <Typography 
                 color="error" 
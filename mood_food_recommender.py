@@ -1,10 +1,17 @@
 import os
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import random
 import json
 import datetime
 import requests
 import asyncio
+import argparse
+import contextlib
+import csv
+import itertools
+import multiprocessing
+import sys
+import time
 from pathlib import Path
 from dotenv import load_dotenv
 from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
@@ -13,7 +20,7 @@ from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassifica
 load_dotenv()
 
 class MoodFoodRecommender:
-    def __init__(self):
+    def __init__(self, user_data: Dict = None):
         # Initialize sentiment analyzer using Transformers
         print("Loading emotion detection model...")
         self.sentiment_analyzer = pipeline(
@@ -22,9 +29,11 @@ class MoodFoodRecommender:
             top_k=3
         )
         
-        # Initialize data storage
+        # Initialize data storage. Given user_data (e.g. batch workers, which share the
+        # parent's copy) the recommender never touches user_data.json itself.
         self.data_file = Path("user_data.json")
-        self.user_data = self.load_user_data()
+        self.persist = user_data is None
+        self.user_data = self.load_user_data() if self.persist else user_data
         
         # Negation words that can reverse the emotion
         self.negation_words = ['not', "don't", "doesn't", "didn't", "won't", "wouldn't", "couldn't", "can't", "never", "no"]
@@ -327,19 +336,12 @@ class MoodFoodRecommender:
 
     def load_user_data(self) -> Dict:
         """Load user data from file or create new if doesn't exist."""
-        if self.data_file.exists():
-            with open(self.data_file, 'r') as f:
-                return json.load(f)
-        return {
-            'preferences': {},
-            'history': [],
-            'favorite_foods': [],
-            'location': 'London',  # Default location
-            'weather_enabled': True
-        }
+        return read_user_data(self.data_file)
 
     def save_user_data(self):
-        """Save user data to file."""
+        """Save user data to file (unless the data was handed in and isn't ours to save)."""
+        if not self.persist:
+            return
         with open(self.data_file, 'w') as f:
             json.dump(self.user_data, f, indent=4)
 
@@ -531,6 +533,27 @@ class MoodFoodRecommender:
 
     def analyze_mood(self, text: str) -> Dict:
         """Analyze the mood from text input using enhanced emotion detection."""
+        keyword_match = self.match_mood_keywords(text)
+        if keyword_match:
+            return keyword_match
+        
+        # If no direct keyword match or low confidence, use emotion detection model
+        emotion_scores = self.sentiment_analyzer(text, truncation=True)
+        return self.interpret_emotions(text, emotion_scores)
+
+    def analyze_mood_batch(self, texts: List[str], batch_size: int = 32) -> List[Dict]:
+        """Analyze many texts, sending only those without a confident keyword match to the model in one call."""
+        results = [self.match_mood_keywords(text) for text in texts]
+        pending = [i for i, result in enumerate(results) if result is None]
+        if pending:
+            emotion_scores = self.sentiment_analyzer([texts[i] for i in pending], batch_size=batch_size,
+                                                     truncation=True)
+            for i, scores in zip(pending, emotion_scores):
+                results[i] = self.interpret_emotions(texts[i], [scores])
+        return results
+
+    def match_mood_keywords(self, text: str) -> Optional[Dict]:
+        """Best direct keyword match with context and intensity, or None when not confident."""
         text_lower = text.lower()
         words = text_lower.split()
         
@@ -596,9 +619,11 @@ class MoodFoodRecommender:
         
         if best_match and best_intensity > 0.5:
             return best_match
-        
-        # If no direct keyword match or low confidence, use emotion detection model
-        emotion_scores = self.sentiment_analyzer(text)
+        return None
+
+    def interpret_emotions(self, text: str, emotion_scores: List) -> Dict:
+        """Map emotion model scores for one text to a mood."""
+        has_negation = any(word in self.negation_words for word in text.lower().split())
         
         # Get top emotions and their scores
         top_emotions = []
@@ -839,5 +864,202 @@ async def main():
             except ValueError:
                 print("Invalid input. No preferences were saved.")
 
+def read_user_data(path: Path) -> Dict:
+    """User data from path, or the defaults if it doesn't exist."""
+    if path.exists():
+        with open(path, 'r') as f:
+            return json.load(f)
+    return {
+        'preferences': {},
+        'history': [],
+        'favorite_foods': [],
+        'location': 'London',  # Default location
+        'weather_enabled': True
+    }
+
+
+def read_records(path: Path, text_field: str = 'text', id_field: str = 'id',
+                 shard: int = 0, num_shards: int = 1) -> Iterator[Dict]:
+    """Stream {'id', 'text'} (or {'id', 'error'}) records for one shard of a JSONL or CSV file."""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if path.suffix.lower() == '.csv':
+            rows = enumerate(csv.DictReader(f))
+        else:
+            # Skip other shards' lines before parsing them
+            rows = ((index, line) for index, line in enumerate(line for line in f if line.strip()))
+        for index, row in rows:
+            if index % num_shards != shard:
+                continue
+            if isinstance(row, str):
+                try:
+                    row = json.loads(row)
+                except json.JSONDecodeError as e:
+                    yield {'id': index, 'error': f"invalid JSON: {e}"}
+                    continue
+            if isinstance(row, str):
+                yield {'id': index, 'text': row}
+            elif isinstance(row, dict) and isinstance(row.get(text_field), str):
+                yield {'id': row.get(id_field, index), 'text': row[text_field]}
+            else:
+                yield {'id': row.get(id_field, index) if isinstance(row, dict) else index,
+                       'error': f"missing '{text_field}'"}
+
+
+def batched(items: Iterable, size: int) -> Iterator[List]:
+    """Group an iterable into lists of at most size items."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def score_records(recommender: 'MoodFoodRecommender', records: Iterable[Dict], batch_size: int,
+                  weather: Dict = None) -> Iterator[Dict]:
+    """Mood and recommendations per record, running the emotion model a batch at a time."""
+    for batch in batched(records, batch_size):
+        valid = [record for record in batch if 'text' in record]
+        analyses = iter(recommender.analyze_mood_batch([record['text'] for record in valid], batch_size))
+        for record in batch:
+            if 'error' in record:
+                yield record
+                continue
+            analysis = next(analyses)
+            yield {
+                'id': record['id'],
+                'mood': analysis['mood'],
+                'intensity': round(analysis['intensity'], 4),
+                'top_emotion': analysis['top_emotion'],
+                'secondary_emotions': analysis['secondary_emotions'],
+                'recommendations': recommender.get_food_recommendations(analysis['mood'], weather)
+            }
+
+
+class Progress:
+    """Periodic count and throughput report on stderr."""
+
+    def __init__(self, label: str, interval: float = 10):
+        self.label = label
+        self.interval = interval
+        self.count = 0
+        self.errors = 0
+        self.started = time.perf_counter()
+        self.last_report = self.started
+
+    def update(self, result: Dict):
+        self.count += 1
+        self.errors += 'error' in result
+        now = time.perf_counter()
+        if now - self.last_report >= self.interval:
+            self.last_report = now
+            self.report()
+
+    def report(self, final: bool = False):
+        elapsed = time.perf_counter() - self.started
+        rate = self.count / elapsed if elapsed else 0.0
+        status = "done" if final else "running"
+        print(f"[{self.label}] {status}: {self.count:,} texts ({self.errors:,} errors) "
+              f"in {elapsed:.0f}s, {rate:,.0f} texts/s", file=sys.stderr, flush=True)
+
+
+def run_shard(input_path: Path, output_path: Path, shard: int, num_shards: int, batch_size: int,
+              text_field: str, id_field: str, use_weather: bool, seed: Optional[int], user_data: Dict) -> int:
+    """Score one shard of the input into output_path; returns the number of records written."""
+    if seed is not None:
+        random.seed(seed + shard)
+    # Keep model loading chatter out of the way of the progress lines
+    with contextlib.redirect_stdout(sys.stderr):
+        # Workers run at once, so none of them may read or write user_data.json
+        recommender = MoodFoodRecommender(user_data=user_data)
+        weather = asyncio.run(recommender.get_weather(recommender.user_data['location'])) if use_weather else None
+    
+    progress = Progress(f"shard {shard + 1}/{num_shards}")
+    records = read_records(input_path, text_field, id_field, shard, num_shards)
+    with open(output_path, 'w', encoding='utf-8') as out:
+        for result in score_records(recommender, records, batch_size, weather):
+            out.write(json.dumps(result) + '\n')
+            progress.update(result)
+    progress.report(final=True)
+    return progress.count
+
+
+def run_batch(args):
+    """Score a JSONL or CSV file of texts into JSONL, optionally across several processes."""
+    input_path, output_path = Path(args.input), Path(args.output)
+    # Read once here; workers get a copy and never touch the file
+    user_data = read_user_data(Path("user_data.json"))
+    options = (args.batch_size, args.text_field, args.id_field, args.weather, args.seed, user_data)
+    started = time.perf_counter()
+    
+    if args.shard:
+        # One slice of a job split across machines: --shard 2/8
+        shard, num_shards = args.shard
+        total = run_shard(input_path, output_path, shard - 1, num_shards, *options)
+    elif args.workers <= 1:
+        total = run_shard(input_path, output_path, 0, 1, *options)
+    else:
+        # Each worker loads its own model and writes its own part; parts are merged back
+        # into input order
+        parts = [output_path.with_name(f"{output_path.name}.part{shard}") for shard in range(args.workers)]
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(args.workers) as pool:
+            counts = pool.starmap(run_shard, [(input_path, part, shard, args.workers, *options)
+                                              for shard, part in enumerate(parts)])
+        merge_shards(parts, output_path)
+        for part in parts:
+            part.unlink()
+        total = sum(counts)
+    
+    elapsed = time.perf_counter() - started
+    print(f"Scored {total:,} texts in {elapsed:.1f}s ({total / elapsed if elapsed else 0:,.0f} texts/s) "
+          f"-> {output_path}", file=sys.stderr)
+
+
+def merge_shards(parts: List[Path], output_path: Path):
+    """Interleave shard outputs back into input order: record i is line i // N of part i % N."""
+    with contextlib.ExitStack() as stack:
+        files = [stack.enter_context(open(part, 'r', encoding='utf-8')) for part in parts]
+        out = stack.enter_context(open(output_path, 'w', encoding='utf-8'))
+        # Earlier shards hold the same number of records as later ones, or one more
+        for lines in itertools.zip_longest(*files):
+            out.writelines(line for line in lines if line is not None)
+
+
+def shard_spec(value: str) -> Tuple[int, int]:
+    """Parse 'K/N' into (K, N) with 1 <= K <= N."""
+    try:
+        shard, num_shards = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected K/N, got '{value}'")
+    if not 1 <= shard <= num_shards:
+        raise argparse.ArgumentTypeError(f"shard must be between 1 and {num_shards}")
+    return shard, num_shards
+
+
+def cli():
+    parser = argparse.ArgumentParser(description='FeelFood mood-based food recommender')
+    subparsers = parser.add_subparsers(dest='command')
+    batch_parser = subparsers.add_parser('batch', help='score a JSONL or CSV file of texts offline')
+    batch_parser.add_argument('input', help='.jsonl (objects or strings, one per line) or .csv with a header')
+    batch_parser.add_argument('output', help='JSONL results, one line per input record')
+    batch_parser.add_argument('--text-field', default='text')
+    batch_parser.add_argument('--id-field', default='id', help='copied to the output; defaults to the row number')
+    batch_parser.add_argument('--batch-size', type=int, default=64, help='texts per emotion model call')
+    batch_parser.add_argument('--workers', type=int, default=1,
+                              help='local processes, each with its own model; output keeps input order')
+    batch_parser.add_argument('--shard', type=shard_spec, help='only score slice K of N (1-based), e.g. 2/8')
+    batch_parser.add_argument('--weather', action='store_true',
+                              help="adjust for the saved location's current weather (fetched once)")
+    batch_parser.add_argument('--seed', type=int, help='seed the random pick among recommendations')
+    args = parser.parse_args()
+    
+    if args.command == 'batch':
+        run_batch(args)
+    else:
+        asyncio.run(main())
+
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    cli() 
\ No newline at end of file